@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+import generate
+from graph import Graph
+
+
+def percentiles(samples):
+    """
+    Returns the p50, p90, p99 and max of a list of samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    result = {}
+    for p in (50, 90, 99):
+        result[f"p{p}"] = ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+    result["max"] = ordered[-1]
+    return result
+
+
+def run_searches(pairs):
+    """
+    Runs every search on each (source, target) pair and returns, per
+    search, the nodes expanded, total seconds and latency percentiles
+    in milliseconds.
+    """
+    searches = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_shortest_path,
+    }
+    if degrees.landmark_index is not None:
+        searches["landmarks"] = degrees.landmark_shortest_path
+
+    results = {}
+    lengths = {}
+    for name, search in searches.items():
+        expanded = 0
+        latencies = []
+        stats = {}
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target, stats=stats)
+            latencies.append((time.perf_counter() - start) * 1000)
+            expanded += stats["expanded"]
+            lengths.setdefault((source, target), set()).add(
+                None if path is None else len(path)
+            )
+        results[name] = {
+            "expanded": expanded,
+            "seconds": sum(latencies) / 1000,
+            "latency_ms": percentiles(latencies),
+        }
+
+    # Every search must agree on every path length
+    mismatches = [pair for pair, found in lengths.items() if len(found) > 1]
+    if mismatches:
+        raise SystemExit(f"Path lengths differ for {len(mismatches)} pairs")
+    return results
+
+
+def peak_rss_kib():
+    """
+    Returns the peak resident set size of this process in KiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_suite(directory, queries, seed):
+    """
+    Loads `directory` from CSV and from its snapshot, then times
+    `queries` random searches, returning every measurement as a dict.
+    """
+    results = {"directory": directory}
+
+    start = time.perf_counter()
+    degrees.load_data(directory, cache=False)
+    results["load_csv_seconds"] = time.perf_counter() - start
+
+    # Write the snapshot, then time loading it
+    degrees.load_data(directory)
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    results["load_snapshot_seconds"] = time.perf_counter() - start
+
+    graph = degrees.graph
+    results["people"] = len(graph.person_ids)
+    results["movies"] = len(graph.movie_ids)
+    results["credits"] = len(graph.person_indices)
+
+    # Query between people who starred in at least one movie
+    rng = random.Random(seed)
+    person_ids = [
+        graph.person_ids[person] for person in range(len(graph.person_ids))
+        if graph.person_indptr[person + 1] > graph.person_indptr[person]
+    ]
+    pairs = [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(queries)
+    ]
+    results["queries"] = queries
+    results["searches"] = run_searches(pairs)
+    results["peak_rss_kib"] = peak_rss_kib()
+    return results
+
+
+def legacy_load(directory):
+    """
+    Loads `directory` into the original dict-of-dicts representation
+    of names, people and movies, for comparison.
+    """
+    names, people, movies = {}, {}, {}
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            people[row["id"]] = {"name": row["name"], "birth": row["birth"], "movies": set()}
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+    with open(os.path.join(directory, "movies.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movies[row["id"]] = {"title": row["title"], "year": row["year"], "stars": set()}
+    with open(os.path.join(directory, "stars.csv"), encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+    return names, people, movies
+
+
+def load_columnar(directory):
+    graph = Graph()
+    graph.load_csv(directory)
+    return graph
+
+
+def measure_memory(directory):
+    """
+    Prints the memory retained by the dict-of-dicts representation
+    and by the columnar Graph after loading `directory`.
+    """
+    retained = {}
+    for name, load in [("dicts", legacy_load), ("columnar", load_columnar)]:
+        tracemalloc.start()
+        data = load(directory)
+        retained[name] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del data
+        print(f"{name:>14}: {retained[name] / 2 ** 20:10.1f} MiB")
+    print(f"{'reduction':>14}: {retained['dicts'] / retained['columnar']:10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Degrees loading and searches, writing results as JSON."
+    )
+    parser.add_argument("--directory",
+                        help="existing dataset to benchmark instead of generating one")
+    parser.add_argument("--people", type=int, default=200000)
+    parser.add_argument("--movies", type=int, default=70000)
+    parser.add_argument("--mean-cast", type=float, default=4)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--memory", action="store_true",
+                        help="compare retained memory of dicts and the columnar graph instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory
+        if directory is None:
+            directory = scratch
+            print("Generating data...", file=sys.stderr)
+            generate.write_dataset(
+                directory, args.people, args.movies, args.mean_cast, seed=args.seed
+            )
+        if args.memory:
+            measure_memory(directory)
+            return
+        results = run_suite(directory, args.queries, args.seed)
+        if args.directory is None:
+            results["directory"] = None
+
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
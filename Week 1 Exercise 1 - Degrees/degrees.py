@@ -1,65 +1,232 @@
-import csv
+import argparse
+import heapq
+import json
+import os
 import sys
+import time
+from contextlib import ExitStack
+from itertools import islice
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks
+import snapshot
+from graph import UNREACHABLE, Constraint, Graph, NamesView, PeopleView, MoviesView, StringTable
+from util import LRUCache, Node, StackFrontier, QueueFrontier, PriorityFrontier
+
+# Interned co-star graph holding all people, movies and stars
+graph = Graph()
 
 # Maps names to a set of corresponding person_ids
-names = {}
+names = NamesView(graph)
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+people = PeopleView(graph)
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+movies = MoviesView(graph)
+
+# BFS trees of recently queried sources, keyed by interned person
+# and search constraint
+tree_cache = LRUCache(16)
 
+# Landmark distance oracle, if one has been built for the dataset
+landmark_index = None
 
-def load_data(directory):
+
+def load_data(directory, cache=True):
     """
     Load data from CSV files into memory.
+
+    With `cache`, the parsed graph is written to a snapshot next to
+    the CSV files and memory-mapped on later runs until any of the
+    CSV files changes.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    global landmark_index
+    path = os.path.join(directory, snapshot.FILENAME)
+    stamp = snapshot.source_stamp(directory)
+    tree_cache.clear()
+    landmark_index = landmarks.LandmarkIndex.load(
+        os.path.join(directory, landmarks.FILENAME), stamp
+    )
+    if cache and snapshot.load(graph, path, stamp):
+        return
+
+    graph.load_csv(directory)
+    if cache:
+        try:
+            snapshot.save(graph, path, stamp)
+        except OSError:
+            # Read-only dataset directories just go without a cache
+            pass
+
+
+def ingest_delta(directory):
+    """
+    Adds the people, movies and stars in the CSV files of `directory`
+    to the loaded data without reloading it. Cached BFS trees and the
+    landmark index are dropped only if a component they cover gained
+    credits. Returns the number of people, movies and stars added.
+    """
+    global landmark_index
+    added, touched = graph.ingest(directory)
+    for source, constraint in list(tree_cache.entries):
+        if graph.component(source) in touched:
+            tree_cache.discard((source, constraint))
+
+    # New credits can only shorten distances, which breaks the lower
+    # bounds of any landmark in a touched component
+    if landmark_index is not None and any(
+        graph.component(landmark) in touched for landmark in landmark_index.landmarks
+    ):
+        landmark_index = None
+    return added
+
+
+def build_landmarks(directory, count):
+    """
+    Builds a landmark index over the loaded data with `count`
+    landmarks and saves it next to the CSV files in `directory`.
+    """
+    global landmark_index
+    landmark_index = landmarks.LandmarkIndex.build(graph, count)
+    landmark_index.save(
+        os.path.join(directory, landmarks.FILENAME), snapshot.source_stamp(directory)
+    )
+
+
+def build_costars(directory, workers=None):
+    """
+    Precomputes the co-star adjacency of the loaded data and saves it
+    into the snapshot in `directory` for later runs.
+    """
+    graph.build_costars(workers)
+    tree_cache.clear()
+    snapshot.save(
+        graph, os.path.join(directory, snapshot.FILENAME), snapshot.source_stamp(directory)
+    )
+
+
+def constraint_for(min_year=None, max_year=None, exclude_path=None):
+    """
+    Returns the Constraint for the given year bounds and file of IMDb
+    movie ids to exclude, or None if there is nothing to constrain.
+    Unknown movie ids in the file are ignored.
+    """
+    excluded = set()
+    if exclude_path is not None:
+        with open(exclude_path, encoding="utf-8") as f:
+            for line in f:
+                movie_id = line.strip()
+                if movie_id in graph.movie_index:
+                    excluded.add(graph.movie_index[movie_id])
+    if min_year is None and max_year is None and not excluded:
+        return None
+    return Constraint(min_year, max_year, excluded)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends and meet in the middle")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated name pairs from FILE ('-' for stdin) as JSON lines")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write batch results or the distance map to FILE")
+    parser.add_argument("--cache-size", type=int, default=tree_cache.capacity,
+                        help="number of source BFS trees kept between batch queries")
+    parser.add_argument("--component-sizes", action="store_true",
+                        help="print the connected component size distribution as JSON")
+    parser.add_argument("--build-landmarks", type=int, metavar="COUNT",
+                        help="build and save a landmark index with COUNT landmarks")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="search towards the target guided by the landmark index")
+    parser.add_argument("--build-costars", type=int, nargs="?", const=0, metavar="WORKERS",
+                        help="precompute co-star adjacency into the snapshot using WORKERS processes")
+    parser.add_argument("--ingest", action="append", default=[], metavar="DIRECTORY",
+                        help="add the CSV rows in DIRECTORY after loading, without saving them; may be repeated")
+    parser.add_argument("--distances", metavar="NAME",
+                        help="compute degrees from NAME to everyone, saving them to --output")
+    parser.add_argument("--all-paths", type=int, metavar="LIMIT",
+                        help="count every shortest path and print up to LIMIT of them")
+    parser.add_argument("--min-year", type=int, metavar="YEAR",
+                        help="only follow movies released in or after YEAR")
+    parser.add_argument("--max-year", type=int, metavar="YEAR",
+                        help="only follow movies released in or before YEAR")
+    parser.add_argument("--exclude-movies", metavar="FILE",
+                        help="never follow the movie_ids listed one per line in FILE")
+    args = parser.parse_args()
+
+    if args.distances is not None:
+        load_data(args.directory)
+        for delta in args.ingest:
+            ingest_delta(delta)
+        constraint = constraint_for(args.min_year, args.max_year, args.exclude_movies)
+        source = person_id_for_name(args.distances)
+        if source is None:
+            sys.exit("Person not found.")
+        if args.output is None:
+            distances = graph.bfs(graph.person_index[source], constraint)[0]
+        else:
+            distances = save_distances(source, args.output, args.directory, constraint)[0]
+
+        # Summarise how many people are at each number of degrees
+        counts = {}
+        for distance in distances:
+            if distance != UNREACHABLE:
+                counts[distance] = counts.get(distance, 0) + 1
+        print(json.dumps({
+            "source": source,
+            "reached": sum(counts.values()),
+            "degrees": dict(sorted(counts.items())),
+        }))
+        return
+
+    if args.build_costars is not None:
+        load_data(args.directory)
+        build_costars(args.directory, args.build_costars or None)
+        print(f"Saved {len(graph.costar_indices)} co-star edges.")
+        return
+
+    if args.build_landmarks is not None:
+        load_data(args.directory)
+        build_landmarks(args.directory, args.build_landmarks)
+        print(f"Saved {args.build_landmarks} landmarks.")
+        return
+
+    if args.component_sizes:
+        load_data(args.directory)
+        for delta in args.ingest:
+            ingest_delta(delta)
+        distribution = graph.component_size_distribution()
+        print(json.dumps({"components": sum(distribution.values()), "sizes": distribution}))
+        return
+
+    if args.batch is not None:
+        # Keep stdout clean for the JSON results
+        tree_cache.capacity = args.cache_size
+        load_data(args.directory)
+        for delta in args.ingest:
+            ingest_delta(delta)
+        constraint = constraint_for(args.min_year, args.max_year, args.exclude_movies)
+        with ExitStack() as stack:
+            # Only close the files opened here, not stdin and stdout
+            queries = sys.stdin
+            if args.batch != "-":
+                queries = stack.enter_context(open(args.batch, encoding="utf-8"))
+            output = sys.stdout
+            if args.output is not None:
+                output = stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            count, elapsed = run_batch(queries, output, constraint)
+        rate = count / elapsed if elapsed > 0 else float("inf")
+        print(f"{count} queries in {elapsed:.3f}s ({rate:.1f} queries/sec)", file=sys.stderr)
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory)
+    for delta in args.ingest:
+        ingest_delta(delta)
+    constraint = constraint_for(args.min_year, args.max_year, args.exclude_movies)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +236,25 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.all_paths is not None:
+        count = count_shortest_paths(source, target, constraint)
+        if count == 0:
+            print("Not connected.")
+            return
+        print(f"{count} shortest paths.")
+        for path in islice(all_shortest_paths(source, target, constraint), args.all_paths):
+            print(" -> ".join(
+                [people[source]["name"]]
+                + [f"({movies[movie]['title']}) {people[person]['name']}" for movie, person in path]
+            ))
+        return
+
+    if args.bidirectional:
+        path = bidirectional_shortest_path(source, target, constraint=constraint)
+    elif args.landmarks:
+        path = landmark_shortest_path(source, target, constraint=constraint)
+    else:
+        path = shortest_path(source, target, constraint=constraint)
 
     if path is None:
         print("Not connected.")
@@ -84,17 +269,27 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None, constraint=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If no possible path, returns None. If `stats` is a dict, the
+    number of expanded nodes is stored under "expanded". Only movies
+    allowed by `constraint`, a graph.Constraint, are followed.
     """
     # If the source and target are the same, return an empty path
     if source == target:
         return []
 
+    # Search over interned person ids
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        if stats is not None:
+            stats["expanded"] = 0
+        return None
+
     # Initialize the frontier with the starting node
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -102,6 +297,8 @@ def shortest_path(source, target):
 
     # Set to track explored nodes
     explored = set()
+    if stats is not None:
+        stats["expanded"] = 0
 
     while not frontier.empty():
         # Remove a node from the frontier
@@ -109,17 +306,19 @@ def shortest_path(source, target):
 
         # Mark node as explored
         explored.add(node.state)
+        if stats is not None:
+            stats["expanded"] += 1
 
         # Expand neighbors
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if person_id not in explored and not frontier.contains_state(person_id):
-                child = Node(state=person_id, parent=node, action=movie_id)
+        for movie, person in graph.neighbors(node.state, constraint):
+            if person not in explored and not frontier.contains_state(person):
+                child = Node(state=person, parent=node, action=movie)
 
                 # If the target is found, reconstruct the path
                 if child.state == target:
                     path = []
                     while child.parent is not None:
-                        path.append((child.action, child.state))
+                        path.append((graph.movie_ids[child.action], graph.person_ids[child.state]))
                         child = child.parent
                     path.reverse()
                     return path
@@ -131,16 +330,357 @@ def shortest_path(source, target):
     return None
 
 
+def bidirectional_shortest_path(source, target, stats=None, constraint=None):
+    """
+    Same contract as shortest_path, but searches from both the source
+    and the target, expanding whichever frontier is smaller one full
+    level at a time until the two searches meet.
+    """
+    if source == target:
+        return []
+
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        if stats is not None:
+            stats["expanded"] = 0
+        return None
+
+    # Each side maps a reached person to the (movie, person) edge
+    # it was reached through, or None for its root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    expanded = 0
+    meet = None
+
+    while forward_frontier and backward_frontier and meet is None:
+        # Pick the smaller side to expand
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, other = forward_frontier, forward, backward
+        else:
+            frontier, parents, other = backward_frontier, backward, forward
+
+        # Expand one full level; the first person reached by both
+        # searches lies on a shortest path
+        next_frontier = []
+        for node in frontier:
+            expanded += 1
+            for movie, person in graph.neighbors(node, constraint):
+                if person in parents:
+                    continue
+                parents[person] = (movie, node)
+                if person in other:
+                    meet = person
+                    break
+                next_frontier.append(person)
+            if meet is not None:
+                break
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    if stats is not None:
+        stats["expanded"] = expanded
+    if meet is None:
+        return None
+
+    # Walk back from the meeting point to the source...
+    path = []
+    person = meet
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((graph.movie_ids[movie], graph.person_ids[person]))
+        person = previous
+    path.reverse()
+
+    # ...then forward from the meeting point to the target
+    person = meet
+    while backward[person] is not None:
+        movie, person = backward[person]
+        path.append((graph.movie_ids[movie], graph.person_ids[person]))
+    return path
+
+
+def degrees_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on len(shortest_path(source, target))
+    from the landmark index. upper is None when no bound is known, and
+    both are None when the two people are not connected.
+    """
+    if source == target:
+        return 0, 0
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        return None, None
+    if landmark_index is None:
+        return 1, None
+    lower = max(1, landmark_index.lower_bound(source, target))
+    return lower, landmark_index.upper_bound(source, target)
+
+
+def degrees_of_separation(source, target):
+    """
+    Returns len(shortest_path(source, target)), or None if not
+    connected, skipping the search when the landmark bounds agree.
+    """
+    lower, upper = degrees_bounds(source, target)
+    if lower is not None and lower == upper:
+        return lower
+    path = landmark_shortest_path(source, target)
+    return None if path is None else len(path)
+
+
+def landmark_shortest_path(source, target, stats=None, constraint=None):
+    """
+    Same contract as shortest_path, found by A* search using the
+    landmark lower bound as heuristic. Nodes whose estimate exceeds
+    the landmark upper bound are never added to the frontier.
+
+    Constraints only lengthen paths, so the lower bound still holds
+    under a `constraint` but the upper bound is not used.
+    """
+    if source == target:
+        return []
+
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if stats is not None:
+        stats["expanded"] = 0
+    if not graph.connected(source, target):
+        return None
+
+    if landmark_index is None:
+        def estimate(person):
+            return 0
+        upper = None
+    else:
+        def estimate(person):
+            return landmark_index.lower_bound(person, target)
+        upper = landmark_index.upper_bound(source, target) if constraint is None else None
+
+    # Degrees from the source of every person added to the frontier
+    depth = {source: 0}
+    frontier = PriorityFrontier()
+    frontier.add(Node(state=source, parent=None, action=None), estimate(source))
+    explored = set()
+
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state in explored:
+            continue
+
+        # The heuristic is consistent, so the first time the target
+        # leaves the frontier its path is a shortest one
+        if node.state == target:
+            path = []
+            while node.parent is not None:
+                path.append((graph.movie_ids[node.action], graph.person_ids[node.state]))
+                node = node.parent
+            path.reverse()
+            return path
+
+        explored.add(node.state)
+        if stats is not None:
+            stats["expanded"] += 1
+
+        for movie, person in graph.neighbors(node.state, constraint):
+            cost = depth[node.state] + 1
+            if person in explored or cost >= depth.get(person, cost + 1):
+                continue
+            priority = cost + estimate(person)
+            if upper is not None and priority > upper:
+                continue
+            depth[person] = cost
+            frontier.add(Node(state=person, parent=node, action=movie), priority)
+
+    return None
+
+
+def all_shortest_paths(source, target, constraint=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connects the source to the target, one at a time. Yields nothing
+    if they are not connected.
+    """
+    dag = graph.path_dag(graph.person_index[source], graph.person_index[target], constraint)
+    if dag is None:
+        return
+    for path in dag:
+        yield [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+
+def count_shortest_paths(source, target, constraint=None):
+    """
+    Returns the number of shortest paths from the source to the
+    target without listing them, or 0 if they are not connected.
+    """
+    dag = graph.path_dag(graph.person_index[source], graph.person_index[target], constraint)
+    return 0 if dag is None else dag.count()
+
+
+def best_shortest_paths(source, target, k, key, constraint=None):
+    """
+    Returns the `k` shortest paths from the source to the target with
+    the largest `key`, a function of the path, holding only `k` paths
+    in memory at a time. For example, with
+    key=lambda path: min(int(movies[movie]["year"] or 0) for movie, person in path)
+    the paths through the most recent movies come first.
+    """
+    return heapq.nlargest(k, all_shortest_paths(source, target, constraint), key=key)
+
+
+def tree_path(tree, target):
+    """
+    Returns the (movie_id, person_id) path from the source of a
+    Graph.bfs tree to the interned person `target`, or None.
+    """
+    distances, parents, parent_movies = tree
+    if parents[target] == -1:
+        return None
+    path = []
+    while parents[target] != target:
+        path.append((graph.movie_ids[parent_movies[target]], graph.person_ids[target]))
+        target = parents[target]
+    path.reverse()
+    return path
+
+
+def save_distances(source, path, directory, constraint=None):
+    """
+    Runs a single-source BFS from `source` under `constraint` and
+    writes its distance and parent arrays to `path`, stamped with the
+    CSV files in `directory`. Returns the Graph.bfs tree.
+    """
+    tree = graph.bfs(graph.person_index[source], constraint)
+    distances, parents, parent_movies = tree
+    snapshot.write(path, {
+        "source": StringTable.from_strings([source]),
+        "distances": distances,
+        "parents": parents,
+        "parent_movies": parent_movies,
+    }, snapshot.source_stamp(directory))
+    return tree
+
+
+def load_distances(path, directory):
+    """
+    Returns (source, tree) for a file written by save_distances, or
+    None if it is missing or the CSV files in `directory` changed.
+    """
+    values = snapshot.read(path, snapshot.source_stamp(directory))
+    if values is None:
+        return None
+    tree = (values["distances"], values["parents"], values["parent_movies"])
+    return values["source"][0], tree
+
+
+def cached_shortest_path(source, target, constraint=None):
+    """
+    Same contract as shortest_path, answered from the BFS tree of
+    `source` under `constraint`, which is built on first use and kept
+    in tree_cache.
+    """
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
+        return None
+    tree = tree_cache.get((source, constraint))
+    if tree is None:
+        tree = graph.bfs(source, constraint)
+        tree_cache.put((source, constraint), tree)
+    return tree_path(tree, target)
+
+
+def run_batch(queries, output, constraint=None):
+    """
+    Answers each tab-separated "source name<TAB>target name" line of
+    `queries`, writing one JSON object per query to `output`. A line
+    "!ingest<TAB>directory" adds that delta with ingest_delta and
+    reports what was added. Every path is limited by `constraint`.
+
+    Returns the number of queries answered and the seconds taken.
+    """
+    count = 0
+    start = time.perf_counter()
+    for line in queries:
+        if not line.strip():
+            continue
+        fields = [field.strip() for field in line.rstrip("\n").split("\t")]
+        if fields[0] == "!ingest" and len(fields) == 2:
+            added = ingest_delta(fields[1])
+            output.write(json.dumps({"ingest": fields[1], "added": added}) + "\n")
+            continue
+        result = {"source": fields[0], "target": fields[-1]}
+        count += 1
+
+        # Resolve names without prompting; ambiguity is an error here
+        ids = []
+        if len(fields) != 2:
+            result["error"] = "Expected two tab-separated names."
+        else:
+            for name in fields:
+                candidates = resolve_name(name)
+                if len(candidates) != 1:
+                    result["error"] = "Person not found." if not candidates else "Ambiguous name."
+                    result["candidates"] = candidates
+                    break
+                ids.append(candidates[0])
+        if "error" in result:
+            output.write(json.dumps(result) + "\n")
+            continue
+
+        path = cached_shortest_path(*ids, constraint=constraint)
+        if path is None:
+            result["degrees"] = None
+            result["path"] = None
+        else:
+            result["degrees"] = len(path)
+            result["path"] = [
+                {
+                    "movie_id": movie_id,
+                    "title": movies[movie_id]["title"],
+                    "person_id": person_id,
+                    "name": people[person_id]["name"],
+                }
+                for movie_id, person_id in path
+            ]
+        output.write(json.dumps(result) + "\n")
+    return count, time.perf_counter() - start
+
+
+def resolve_name(name, limit=10):
+    """
+    Returns the person_ids a name may refer to: exact matches if there
+    are any, otherwise people whose name starts with it, otherwise the
+    closest fuzzy matches. At most `limit` ids come from the fallbacks.
+    """
+    person_ids = sorted(names.get(name.lower(), set()))
+    if person_ids:
+        return person_ids
+    people = graph.people_with_prefix(name, limit)
+    if not people:
+        matches = graph.people_like(name, limit)
+        people = [person for score, person in matches if score == matches[0][0]]
+    return [graph.person_ids[person] for person in people]
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
-    resolving ambiguities as needed.
+    resolving ambiguities as needed. Prefix and fuzzy
+    matches are always confirmed, even if there is one.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = resolve_name(name)
+    exact = bool(names.get(name.lower()))
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
+    elif len(person_ids) > 1 or not exact:
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -163,11 +703,9 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.all_neighbors(graph.person_index[person_id]):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
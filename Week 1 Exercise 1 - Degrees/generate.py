@@ -0,0 +1,94 @@
+import argparse
+import csv
+import os
+import random
+from itertools import accumulate
+
+SYLLABLES = (
+    "al", "an", "ar", "be", "bo", "ca", "da", "de", "el", "en", "er", "fa",
+    "ga", "ha", "ia", "in", "jo", "ka", "la", "le", "li", "lo", "ma", "mi",
+    "na", "ne", "ni", "no", "or", "ra", "re", "ri", "ro", "sa", "se", "so",
+    "ta", "te", "ti", "to", "va", "vi", "wa", "ya", "za",
+)
+
+
+def random_name(rng):
+    """
+    Returns a pronounceable two-part name such as "Lomari Tesa".
+    """
+    parts = []
+    for _ in range(2):
+        part = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        parts.append(part.capitalize())
+    return " ".join(parts)
+
+
+def write_dataset(directory, n_people, n_movies, mean_cast=4, alpha=2.5, skew=0.8, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv to `directory`.
+
+    Cast sizes follow a Pareto distribution with shape `alpha` scaled
+    to average about `mean_cast`, and stars are drawn with Zipf weights
+    of exponent `skew` so a few people appear in very many movies, as
+    on IMDb.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([i + 1, random_name(rng), birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(n_movies):
+            writer.writerow([i + 1, random_name(rng), rng.randint(1920, 2025)])
+
+    # The person at popularity rank r is drawn with weight r ** -skew;
+    # ranks are shuffled so that popularity is unrelated to id
+    popularity = list(range(1, n_people + 1))
+    rng.shuffle(popularity)
+    cum_weights = list(accumulate((rank + 1) ** -skew for rank in range(n_people)))
+
+    # A Pareto(alpha) variate has mean alpha / (alpha - 1)
+    scale = mean_cast * (alpha - 1) / alpha
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for i in range(n_movies):
+            cast_size = min(n_people, max(1, round(scale * rng.paretovariate(alpha))))
+            cast = set()
+            while len(cast) < cast_size:
+                drawn = rng.choices(popularity, cum_weights=cum_weights, k=cast_size - len(cast))
+                cast.update(drawn)
+            for person in cast:
+                writer.writerow([person, i + 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic Degrees dataset with power-law casts."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=1000000)
+    parser.add_argument("--movies", type=int, default=350000)
+    parser.add_argument("--mean-cast", type=float, default=4)
+    parser.add_argument("--alpha", type=float, default=2.5,
+                        help="Pareto shape of the cast size distribution")
+    parser.add_argument("--skew", type=float, default=0.8,
+                        help="Zipf exponent of how often each person is cast")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_dataset(
+        args.directory, args.people, args.movies,
+        args.mean_cast, args.alpha, args.skew, args.seed
+    )
+
+
+if __name__ == "__main__":
+    main()
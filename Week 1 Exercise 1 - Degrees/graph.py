@@ -0,0 +1,1094 @@
+import csv
+import os
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, namedtuple
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+
+# Distance stored for people a search from the source cannot reach
+UNREACHABLE = 255
+
+
+class Graph():
+    """
+    Bipartite person/movie graph with IMDb ids interned to dense ints.
+
+    Both directions of the star relation are stored in CSR form: the
+    movies of person p are person_indices[person_indptr[p]:person_indptr[p + 1]]
+    and the stars of movie m are movie_indices[movie_indptr[m]:movie_indptr[m + 1]].
+    Each person's movies are sorted by year, so the movies within a
+    range of years are a contiguous slice of the row.
+
+    Every attribute in SNAPSHOT_FIELDS is either a StringTable or a flat
+    array, so the whole graph can be written to and memory-mapped from
+    a snapshot file (see snapshot.py).
+
+    Rows added by ingest() extend the columns in place; their credits
+    live in small overlay dicts on top of the CSR arrays until compact()
+    folds them in.
+    """
+
+    SNAPSHOT_FIELDS = (
+        "person_ids", "person_names", "person_births",
+        "movie_ids", "movie_titles", "movie_years",
+        "person_order", "movie_order", "name_order",
+        "person_indptr", "person_indices",
+        "movie_indptr", "movie_indices",
+        "person_components", "component_sizes",
+        "costar_indptr", "costar_indices", "costar_movies",
+        "trigram_keys", "trigram_indptr", "trigram_people", "trigram_counts",
+    )
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Drops all loaded data.
+        """
+        # Interned ids and record columns, indexed by int; births and
+        # years are stored as numbers with 0 for unknown
+        self.person_ids = StringTable()
+        self.person_names = StringTable()
+        self.person_births = array("H")
+        self.movie_ids = StringTable()
+        self.movie_titles = StringTable()
+        self.movie_years = array("H")
+
+        # Interned ints sorted by IMDb id, and people sorted by lowercased name
+        self.person_order = array("i")
+        self.movie_order = array("i")
+        self.name_order = array("i")
+
+        # CSR adjacency in both directions
+        self.person_indptr = array("i", [0])
+        self.person_indices = array("i")
+        self.movie_indptr = array("i", [0])
+        self.movie_indices = array("i")
+
+        # Connected component label of each person, and size of each component
+        self.person_components = array("i")
+        self.component_sizes = array("i")
+
+        # Optional deduplicated person -> co-star CSR adjacency with one
+        # representative movie per edge; empty until build_costars runs
+        self.costar_indptr = array("i")
+        self.costar_indices = array("i")
+        self.costar_movies = array("i")
+
+        # Sorted trigrams of lowercased names, in CSR form the people
+        # whose name contains each trigram, and each name's trigram count
+        self.trigram_keys = StringTable()
+        self.trigram_indptr = array("i", [0])
+        self.trigram_people = array("i")
+        self.trigram_counts = array("H")
+
+        self.clear_overlay()
+        self.build_indexes()
+
+    def clear_overlay(self):
+        """
+        Drops the structures that track rows added by ingest().
+        """
+        # Credits added since the CSR arrays were built
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+        # Trigram postings of people added since build_trigrams
+        self.extra_trigrams = {}
+
+        # Component labels merged by ingest(), mapped to the label they
+        # were merged into
+        self.component_parent = {}
+
+        # People whose precomputed co-stars are out of date
+        self.stale_costars = set()
+
+    def build_indexes(self):
+        """
+        Creates the id and name lookups over the sorted orders.
+        """
+        self.person_index = SortedIndex(self.person_ids, self.person_order)
+        self.movie_index = SortedIndex(self.movie_ids, self.movie_order)
+        self.name_index = SortedIndex(self.person_names, self.name_order, key=str.lower)
+
+    def load_csv(self, directory):
+        """
+        Load people.csv, movies.csv and stars.csv from `directory`,
+        replacing any data already held by the graph, including rows
+        added by ingest() and precomputed co-stars.
+        """
+        self.clear()
+
+        person_index = {}
+        person_ids, person_names, person_births = [], [], array("H")
+        movie_index = {}
+        movie_ids, movie_titles, movie_years = [], [], array("H")
+
+        # Load people
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(parse_year(row["birth"]))
+
+        # Load movies
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(parse_year(row["year"]))
+
+        # Load stars as parallel edge lists, skipping unknown ids
+        edge_people = array("i")
+        edge_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        self.person_ids = StringTable.from_strings(person_ids)
+        self.person_names = StringTable.from_strings(person_names)
+        self.person_births = person_births
+        self.movie_ids = StringTable.from_strings(movie_ids)
+        self.movie_titles = StringTable.from_strings(movie_titles)
+        self.movie_years = movie_years
+
+        self.person_order = sorted_order(person_ids)
+        self.movie_order = sorted_order(movie_ids)
+        self.name_order = sorted_order(person_names, key=str.lower)
+        self.build_trigrams(person_names)
+
+        self.person_indptr, self.person_indices = build_csr(
+            edge_people, edge_movies, len(person_ids), key=self.movie_year_key
+        )
+        self.movie_indptr, self.movie_indices = build_csr(
+            edge_movies, edge_people, len(movie_ids)
+        )
+        self.build_components()
+        self.build_indexes()
+
+    def movie_year_key(self, movie):
+        """
+        Sort key ordering movies by year, then by interned id.
+        """
+        return self.movie_years[movie], movie
+
+    def build_trigrams(self, person_names):
+        """
+        Builds the trigram postings used by people_like().
+        """
+        postings = {}
+        self.trigram_counts = array("H")
+        for person, name in enumerate(person_names):
+            grams = trigrams(name)
+            self.trigram_counts.append(min(len(grams), 0xFFFF))
+            for trigram in grams:
+                postings.setdefault(trigram, array("i")).append(person)
+
+        keys = sorted(postings)
+        self.trigram_keys = StringTable.from_strings(keys)
+        self.trigram_indptr = array("i", [0])
+        self.trigram_people = array("i")
+        for key in keys:
+            self.trigram_people.extend(postings[key])
+            self.trigram_indptr.append(len(self.trigram_people))
+
+    def people_with_prefix(self, prefix, limit=None):
+        """
+        Returns up to `limit` interned people whose lowercased name
+        starts with `prefix`, in name order.
+        """
+        prefix = prefix.lower()
+        names = self.person_names
+
+        def key(person):
+            return names[person].lower()[:len(prefix)]
+
+        lo = bisect_left(self.name_order, prefix, key=key)
+        hi = bisect_right(self.name_order, prefix, lo=lo, key=key)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return list(self.name_order[lo:hi])
+
+    def people_like(self, name, limit=10, threshold=0.5):
+        """
+        Returns up to `limit` (score, person) pairs, best first, for
+        people whose name has a trigram Dice similarity of at least
+        `threshold` with `name`.
+
+        The time taken grows with the length of the posting lists of
+        the query's trigrams rather than with the number of people,
+        but common trigrams can make those lists long: about 20ms per
+        typo on 300k generated names, against well under 1ms for
+        people_with_prefix().
+        """
+        query = trigrams(name)
+        if not query:
+            return []
+
+        # Posting lists of the query's trigrams, rarest first
+        postings = []
+        for trigram in query:
+            i = bisect_left(self.trigram_keys, trigram)
+            if i < len(self.trigram_keys) and self.trigram_keys[i] == trigram:
+                posting = self.trigram_people[self.trigram_indptr[i]:self.trigram_indptr[i + 1]]
+            else:
+                posting = ()
+
+            # Include people added by ingest() since build_trigrams
+            extra = self.extra_trigrams.get(trigram)
+            postings.append(posting if extra is None else [*posting, *extra])
+        postings.sort(key=len)
+
+        # A name scoring at least `threshold` shares at least `needed`
+        # trigrams with the query, so it must appear in one of the
+        # len(query) - needed + 1 rarest lists
+        needed = max(1, ceil(threshold * len(query) / (2 - threshold)))
+        rare = len(query) - needed + 1
+        shared = Counter()
+        for posting in postings[:rare]:
+            shared.update(posting)
+
+        # The remaining common trigrams are only counted for those
+        # candidates, intersecting each list with them in one C call
+        # rather than looking every candidate up in Python
+        candidates = set(shared)
+        for posting in postings[rare:]:
+            shared.update(candidates.intersection(posting))
+
+        matches = []
+        for person, count in shared.items():
+            if count < needed:
+                continue
+            score = 2 * count / (len(query) + self.trigram_counts[person])
+            if score >= threshold:
+                matches.append((score, person))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return matches[:limit]
+
+    def build_components(self):
+        """
+        Labels the connected components of the co-star graph with a
+        union-find over each movie's stars.
+        """
+        parent = array("i", range(len(self.person_ids)))
+
+        def find(person):
+            # Path halving keeps the trees shallow
+            while parent[person] != person:
+                parent[person] = parent[parent[person]]
+                person = parent[person]
+            return person
+
+        # Union every star of a movie with its first star
+        for movie in range(len(self.movie_ids)):
+            stars = self.stars_of(movie)
+            if len(stars) < 2:
+                continue
+            root = find(stars[0])
+            for person in stars[1:]:
+                other = find(person)
+                if other != root:
+                    parent[other] = root
+
+        # Relabel roots densely in order of first appearance
+        labels = {}
+        self.person_components = array("i", bytes(4 * len(parent)))
+        self.component_sizes = array("i")
+        for person in range(len(parent)):
+            root = find(person)
+            if root not in labels:
+                labels[root] = len(labels)
+                self.component_sizes.append(0)
+            self.person_components[person] = labels[root]
+            self.component_sizes[labels[root]] += 1
+
+    def component(self, person):
+        """
+        Returns the component label of an interned person.
+        """
+        return self._root(self.person_components[person])
+
+    def connected(self, a, b):
+        """
+        Returns whether interned people `a` and `b` are in the same
+        connected component.
+        """
+        if not self.component_parent:
+            return self.person_components[a] == self.person_components[b]
+        return self.component(a) == self.component(b)
+
+    def component_size_distribution(self):
+        """
+        Returns a dict mapping each component size to the number of
+        components of that size, in ascending order of size.
+        """
+        distribution = {}
+        for size in sorted(self.component_sizes):
+            # Components merged by ingest() are left with size 0
+            if size > 0:
+                distribution[size] = distribution.get(size, 0) + 1
+        return distribution
+
+    def movies_of(self, person, constraint=None):
+        """
+        Returns the interned movies a person starred in, limited to
+        those allowed by `constraint` if one is given.
+        """
+        if person + 1 < len(self.person_indptr):
+            lo, hi = self.person_indptr[person], self.person_indptr[person + 1]
+        else:
+            lo = hi = 0
+        extra = self.extra_movies.get(person)
+        if constraint is None:
+            movies = self.person_indices[lo:hi]
+            return movies if extra is None else [*movies, *extra]
+
+        # Rows are sorted by year, so the year bounds are a slice
+        if constraint.has_years():
+            years = self.movie_years.__getitem__
+            lo = bisect_left(self.person_indices, constraint.first_year(), lo, hi, key=years)
+            if constraint.max_year is not None:
+                hi = bisect_right(self.person_indices, constraint.max_year, lo, hi, key=years)
+        movies = self.person_indices[lo:hi]
+        if constraint.excluded:
+            movies = [movie for movie in movies if movie not in constraint.excluded]
+        if extra is not None:
+            movies = [*movies, *(movie for movie in extra if constraint.allows(self, movie))]
+        return movies
+
+    def stars_of(self, movie):
+        """
+        Returns the interned people who starred in a movie.
+        """
+        if movie + 1 < len(self.movie_indptr):
+            stars = self.movie_indices[self.movie_indptr[movie]:self.movie_indptr[movie + 1]]
+        else:
+            stars = ()
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else [*stars, *extra]
+
+    def ingest(self, directory):
+        """
+        Appends the rows of any people.csv, movies.csv and stars.csv in
+        `directory` to the graph. Ids that are already known and
+        credits for unknown ids are skipped.
+
+        Returns (added, touched): the number of people, movies and stars
+        added, and the set of component labels that gained credits,
+        whose cached searches are now out of date.
+        """
+        self.make_mutable()
+        added = {"people": 0, "movies": 0, "stars": 0}
+        touched = set()
+
+        path = os.path.join(directory, "people.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row["id"] not in self.person_index:
+                        self._add_person(row["id"], row["name"], parse_year(row["birth"]))
+                        added["people"] += 1
+
+        path = os.path.join(directory, "movies.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row["id"] not in self.movie_index:
+                        movie = len(self.movie_ids)
+                        self.movie_ids.append(row["id"])
+                        self.movie_titles.append(row["title"])
+                        self.movie_years.append(parse_year(row["year"]))
+                        insort(self.movie_order, movie, key=self.movie_ids.__getitem__)
+                        added["movies"] += 1
+
+        path = os.path.join(directory, "stars.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        person = self.person_index[row["person_id"]]
+                        movie = self.movie_index[row["movie_id"]]
+                    except KeyError:
+                        continue
+                    if movie in self.movies_of(person):
+                        continue
+                    self.extra_movies.setdefault(person, []).append(movie)
+                    self.extra_stars.setdefault(movie, []).append(person)
+                    added["stars"] += 1
+
+                    # Join the person's component to the rest of the cast;
+                    # everyone in the cast gains a co-star
+                    stars = self.stars_of(movie)
+                    for other in stars:
+                        if other != person:
+                            self._union(person, other)
+                            break
+                    self.stale_costars.update(stars)
+                    touched.add(self.component(person))
+
+        # Labels may have been merged after they were touched
+        return added, {self._root(label) for label in touched}
+
+    def _add_person(self, person_id, name, birth):
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        insort(self.person_order, person, key=self.person_ids.__getitem__)
+        insort(self.name_order, person, key=lambda i: self.person_names[i].lower())
+
+        grams = trigrams(name)
+        self.trigram_counts.append(min(len(grams), 0xFFFF))
+        for trigram in grams:
+            self.extra_trigrams.setdefault(trigram, []).append(person)
+
+        # Each new person starts in a component of their own
+        self.person_components.append(len(self.component_sizes))
+        self.component_sizes.append(1)
+
+    def _root(self, label):
+        while label in self.component_parent:
+            label = self.component_parent[label]
+        return label
+
+    def _union(self, a, b):
+        # Merge the smaller component's label into the larger one's
+        a, b = self.component(a), self.component(b)
+        if a == b:
+            return
+        if self.component_sizes[a] < self.component_sizes[b]:
+            a, b = b, a
+        self.component_parent[b] = a
+        self.component_sizes[a] += self.component_sizes[b]
+        self.component_sizes[b] = 0
+
+    def make_mutable(self):
+        """
+        Copies any memory-mapped snapshot fields into in-memory arrays
+        and byte strings so that rows can be appended to them.
+        """
+        for field in self.SNAPSHOT_FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, StringTable):
+                if not isinstance(value.blob, bytearray):
+                    setattr(self, field, StringTable(
+                        bytearray(value.blob), array("q", bytes(value.offsets))
+                    ))
+            elif isinstance(value, memoryview):
+                setattr(self, field, array(value.format, bytes(value)))
+        self.build_indexes()
+
+    def compact(self):
+        """
+        Folds rows added by ingest() into the CSR arrays, component
+        labels and trigram index. Precomputed co-stars that ingest()
+        made stale are dropped and need build_costars again.
+        """
+        if not (self.extra_movies or self.extra_trigrams or self.component_parent):
+            return
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person in range(len(self.person_ids)):
+            for movie in self.movies_of(person):
+                edge_people.append(person)
+                edge_movies.append(movie)
+        person_names = list(self.person_names)
+        stale = bool(self.stale_costars)
+
+        self.clear_overlay()
+        self.person_indptr, self.person_indices = build_csr(
+            edge_people, edge_movies, len(self.person_ids), key=self.movie_year_key
+        )
+        self.movie_indptr, self.movie_indices = build_csr(
+            edge_movies, edge_people, len(self.movie_ids)
+        )
+        self.build_components()
+        self.build_trigrams(person_names)
+        if stale:
+            self.costar_indptr = array("i")
+            self.costar_indices = array("i")
+            self.costar_movies = array("i")
+
+    def build_costars(self, workers=None, chunk_size=65536):
+        """
+        Precomputes the co-star adjacency used by neighbors(), splitting
+        people into chunks of `chunk_size` spread over a pool of
+        `workers` processes (all CPUs by default, in-process if 1).
+        """
+        self.compact()
+        chunks = [
+            (lo, min(lo + chunk_size, len(self.person_ids)))
+            for lo in range(0, len(self.person_ids), chunk_size)
+        ]
+        arrays = (
+            self.person_indptr, self.person_indices,
+            self.movie_indptr, self.movie_indices,
+        )
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers == 1 or len(chunks) <= 1:
+            _init_costar_worker(*arrays)
+            results = [_costar_chunk(lo, hi) for lo, hi in chunks]
+        else:
+            # Workers get their own copy of the adjacency arrays once
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_costar_worker,
+                initargs=tuple(array("i", bytes(a)) for a in arrays),
+            ) as executor:
+                results = list(executor.map(_costar_chunk, *zip(*chunks)))
+
+        # Stitch the chunks together, shifting each chunk's offsets
+        self.costar_indptr = array("i", [0])
+        self.costar_indices = array("i")
+        self.costar_movies = array("i")
+        for counts, costars, movies in results:
+            base = len(self.costar_indices)
+            self.costar_indptr.extend(base + count for count in counts)
+            self.costar_indices.extend(costars)
+            self.costar_movies.extend(movies)
+
+    def all_neighbors(self, person, constraint=None):
+        """
+        Yields interned (movie, person) pairs for everyone who shared
+        a movie allowed by `constraint` with `person`, the person
+        themself included.
+        """
+        for movie in self.movies_of(person, constraint):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def neighbors(self, person, constraint=None):
+        """
+        Yields interned (movie, person) pairs for the co-stars of
+        `person`. Once build_costars has run, each co-star appears once
+        with a representative movie and the person themself is left
+        out; otherwise, or under a `constraint`, this is all_neighbors.
+        """
+        if (constraint is not None or person + 1 >= len(self.costar_indptr)
+                or person in self.stale_costars):
+            yield from self.all_neighbors(person, constraint)
+            return
+        costar_movies = self.costar_movies
+        costar_indices = self.costar_indices
+        for k in range(self.costar_indptr[person], self.costar_indptr[person + 1]):
+            yield costar_movies[k], costar_indices[k]
+
+    def bfs(self, source, constraint=None):
+        """
+        Runs a level-synchronous BFS from the interned person `source`,
+        expanding one whole frontier array per level and only following
+        movies allowed by `constraint`.
+
+        Returns (distances, parents, parent_movies) arrays indexed by
+        person: distances are degrees from the source as uint8, capped
+        at UNREACHABLE - 1 and UNREACHABLE for other components; every
+        reached person was reached from parents[person] through
+        parent_movies[person]. Unreached people have parent -1 and the
+        source is its own parent, so any path unwinds in O(depth).
+        """
+        n = len(self.person_ids)
+        distances = array("B", [UNREACHABLE]) * n
+        parents = array("i", [-1]) * n
+        parent_movies = array("i", [-1]) * n
+        distances[source] = 0
+        parents[source] = source
+
+        frontier = array("i", [source])
+        depth = 0
+        while frontier:
+            # Distances saturate just below UNREACHABLE
+            depth = min(depth + 1, UNREACHABLE - 1)
+            next_frontier = array("i")
+            for node in frontier:
+                for movie, person in self.neighbors(node, constraint):
+                    if distances[person] == UNREACHABLE:
+                        distances[person] = depth
+                        parents[person] = node
+                        parent_movies[person] = movie
+                        next_frontier.append(person)
+            frontier = next_frontier
+        return distances, parents, parent_movies
+
+    def path_dag(self, source, target, constraint=None):
+        """
+        Returns the PathDAG of every shortest path between the interned
+        people `source` and `target` through movies allowed by
+        `constraint`, or None if they are not connected.
+
+        The BFS from `source` stops after the level holding `target`
+        and records every (movie, parent) one level up for each person
+        it reaches, since each of them starts a distinct shortest path.
+        """
+        if source == target:
+            return PathDAG(source, target, {})
+        if not self.connected(source, target):
+            return None
+
+        depth = {source: 0}
+        parents = {}
+        frontier = [source]
+        level = 0
+        while frontier and target not in parents:
+            level += 1
+            next_frontier = []
+            for node in frontier:
+                # Co-star rows keep one movie per pair, so go through
+                # every credit instead
+                for movie, person in self.all_neighbors(node, constraint):
+                    seen = depth.get(person)
+                    if seen is None:
+                        depth[person] = level
+                        parents[person] = [(movie, node)]
+                        next_frontier.append(person)
+                    elif seen == level:
+                        parents[person].append((movie, node))
+            frontier = next_frontier
+        if target not in parents:
+            return None
+
+        # Keep only the people some shortest path to the target uses
+        kept = {}
+        stack = [target]
+        while stack:
+            person = stack.pop()
+            if person == source or person in kept:
+                continue
+            kept[person] = parents[person]
+            stack.extend(parent for movie, parent in parents[person])
+        return PathDAG(source, target, kept)
+
+
+class PathDAG():
+    """
+    Every shortest path between two interned people, stored as the
+    list of (movie, parent) edges into each person on any of them.
+    """
+
+    def __init__(self, source, target, parents):
+        self.source = source
+        self.target = target
+        self.parents = parents
+
+    def degrees(self):
+        """
+        Returns the length shared by all the paths.
+        """
+        degrees = 0
+        person = self.target
+        while person != self.source:
+            person = self.parents[person][0][1]
+            degrees += 1
+        return degrees
+
+    def count(self):
+        """
+        Returns the number of shortest paths without listing them, by
+        summing path counts over the parents of each person.
+        """
+        counts = {self.source: 1}
+        # Walk up until every parent of a person is counted, then fill
+        # in counts on the way back down
+        stack = [self.target] if self.target != self.source else []
+        while stack:
+            person = stack[-1]
+            pending = [parent for movie, parent in self.parents.get(person, ())
+                       if parent not in counts]
+            if pending:
+                stack.extend(pending)
+            else:
+                counts[person] = sum(counts[parent] for movie, parent in self.parents[person])
+                stack.pop()
+        return counts[self.target]
+
+    def __iter__(self):
+        """
+        Yields each shortest path as a list of interned (movie, person)
+        pairs from the source to the target, holding only the current
+        path in memory.
+        """
+        if self.source == self.target:
+            yield []
+            return
+
+        # Depth-first walk from the target back to the source, with an
+        # iterator over the parents of each person on the current path
+        path = []
+        stack = [iter(self.parents[self.target])]
+        people = [self.target]
+        while stack:
+            step = next(stack[-1], None)
+            if step is None:
+                stack.pop()
+                people.pop()
+                if path:
+                    path.pop()
+                continue
+            movie, parent = step
+            path.append((movie, people[-1]))
+            if parent == self.source:
+                yield path[::-1]
+                path.pop()
+            else:
+                stack.append(iter(self.parents[parent]))
+                people.append(parent)
+
+
+# Adjacency arrays of the Graph a build_costars worker is processing
+_costar_arrays = None
+
+
+def _init_costar_worker(person_indptr, person_indices, movie_indptr, movie_indices):
+    global _costar_arrays
+    _costar_arrays = (person_indptr, person_indices, movie_indptr, movie_indices)
+
+
+def _costar_chunk(lo, hi):
+    """
+    Returns (ends, costars, movies) for people lo..hi-1: each person's
+    co-stars sorted, the first movie shared with each, and the end
+    offset of each person's row relative to the chunk.
+    """
+    person_indptr, person_indices, movie_indptr, movie_indices = _costar_arrays
+    ends = array("i")
+    costars = array("i")
+    movies = array("i")
+    for person in range(lo, hi):
+        first_movie = {}
+        for k in range(person_indptr[person], person_indptr[person + 1]):
+            movie = person_indices[k]
+            for j in range(movie_indptr[movie], movie_indptr[movie + 1]):
+                first_movie.setdefault(movie_indices[j], movie)
+        first_movie.pop(person, None)
+        for costar in sorted(first_movie):
+            costars.append(costar)
+            movies.append(first_movie[costar])
+        ends.append(len(costars))
+    return ends, costars, movies
+
+
+def build_csr(rows, cols, n, key=None):
+    """
+    Builds CSR (indptr, indices) arrays for `n` rows from parallel edge
+    lists. Each row's column indices are sorted, by `key` if given,
+    with duplicates removed.
+    """
+    # Count edges per row and turn the counts into row offsets
+    indptr = array("i", bytes(4 * (n + 1)))
+    for row in rows:
+        indptr[row + 1] += 1
+    for i in range(n):
+        indptr[i + 1] += indptr[i]
+
+    # Scatter each edge into its row's slot
+    indices = array("i", bytes(4 * len(rows)))
+    fill = indptr[:-1]
+    for row, col in zip(rows, cols):
+        indices[fill[row]] = col
+        fill[row] += 1
+
+    # Sort each row and drop duplicate edges
+    compact_indptr = array("i", [0])
+    compact_indices = array("i")
+    for i in range(n):
+        compact_indices.extend(sorted(set(indices[indptr[i]:indptr[i + 1]]), key=key))
+        compact_indptr.append(len(compact_indices))
+    return compact_indptr, compact_indices
+
+
+class Constraint(namedtuple("Constraint", ["min_year", "max_year", "excluded"])):
+    """
+    Restricts a search to movies from min_year to max_year inclusive,
+    either bound optional, and not in the `excluded` set of interned
+    movies. Movies with an unknown year fail any year bound.
+
+    Constraints are hashable so they can be part of a cache key.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, min_year=None, max_year=None, excluded=()):
+        return super().__new__(cls, min_year, max_year, frozenset(excluded))
+
+    def has_years(self):
+        return self.min_year is not None or self.max_year is not None
+
+    def first_year(self):
+        # Unknown years are stored as 0, below every real year
+        return max(self.min_year or 1, 1)
+
+    def allows(self, graph, movie):
+        """
+        Returns whether the interned movie passes the constraint.
+        """
+        if movie in self.excluded:
+            return False
+        if not self.has_years():
+            return True
+        year = graph.movie_years[movie]
+        return year >= self.first_year() and (self.max_year is None or year <= self.max_year)
+
+
+def parse_year(value):
+    """
+    Returns a CSV year as a number, or 0 if it is blank or invalid.
+    """
+    try:
+        year = int(value)
+    except ValueError:
+        return 0
+    return year if 0 < year <= 0xFFFF else 0
+
+
+def format_year(year):
+    """
+    Returns a stored year as it appeared in the CSV files.
+    """
+    return str(year) if year else ""
+
+
+def trigrams(name):
+    """
+    Returns the set of padded three-character substrings of a
+    lowercased name.
+    """
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def sorted_order(strings, key=None):
+    """
+    Returns the indices of `strings` in sorted order of their keys.
+    """
+    if key is None:
+        return array("i", sorted(range(len(strings)), key=strings.__getitem__))
+    return array("i", sorted(range(len(strings)), key=lambda i: key(strings[i])))
+
+
+class StringTable(Sequence):
+    """
+    Immutable list of strings packed into a single UTF-8 buffer:
+    string i is blob[offsets[i]:offsets[i + 1]]. The buffer and offsets
+    may be bytes/arrays or memoryviews into a snapshot.
+    """
+
+    def __init__(self, blob=b"", offsets=None):
+        self.blob = blob
+        self.offsets = array("q", [0]) if offsets is None else offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        size = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            size += len(chunk)
+            offsets.append(size)
+        return cls(b"".join(chunks), offsets)
+
+    def append(self, string):
+        """
+        Adds a string to the end of a table whose blob is a bytearray.
+        """
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedIndex():
+    """
+    Looks up positions in a StringTable by binary search over `order`,
+    the table's indices sorted by `key` of each string.
+    """
+
+    def __init__(self, table, order, key=None):
+        self.table = table
+        self.order = order
+        self.key = key
+
+    def _bounds(self, value):
+        table, key = self.table, self.key
+        if key is None:
+            lookup = table.__getitem__
+        else:
+            value = key(value)
+            lookup = lambda i: key(table[i])
+        lo = bisect_left(self.order, value, key=lookup)
+        hi = bisect_right(self.order, value, lo=lo, key=lookup)
+        return lo, hi
+
+    def find_all(self, value):
+        """
+        Returns every index whose string has the same key as `value`.
+        """
+        lo, hi = self._bounds(value)
+        return list(self.order[lo:hi])
+
+    def __getitem__(self, value):
+        lo, hi = self._bounds(value)
+        if lo == hi:
+            raise KeyError(value)
+        return self.order[lo]
+
+    def __contains__(self, value):
+        lo, hi = self._bounds(value)
+        return lo < hi
+
+
+class PersonRecord(Mapping):
+    """
+    Read-only view of one person as a dictionary of name, birth,
+    movies (a set of movie_ids), read from the Graph's columns on access.
+    """
+
+    __slots__ = ("graph", "person")
+
+    KEYS = ("name", "birth", "movies")
+
+    def __init__(self, graph, person):
+        self.graph = graph
+        self.person = person
+
+    def __getitem__(self, key):
+        graph, person = self.graph, self.person
+        if key == "name":
+            return graph.person_names[person]
+        if key == "birth":
+            return format_year(graph.person_births[person])
+        if key == "movies":
+            return {graph.movie_ids[movie] for movie in graph.movies_of(person)}
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+
+class MovieRecord(Mapping):
+    """
+    Read-only view of one movie as a dictionary of title, year,
+    stars (a set of person_ids), read from the Graph's columns on access.
+    """
+
+    __slots__ = ("graph", "movie")
+
+    KEYS = ("title", "year", "stars")
+
+    def __init__(self, graph, movie):
+        self.graph = graph
+        self.movie = movie
+
+    def __getitem__(self, key):
+        graph, movie = self.graph, self.movie
+        if key == "title":
+            return graph.movie_titles[movie]
+        if key == "year":
+            return format_year(graph.movie_years[movie])
+        if key == "stars":
+            return {graph.person_ids[person] for person in graph.stars_of(movie)}
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` dictionary over a Graph: maps person_ids to
+    a PersonRecord of name, birth, movies (a set of movie_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        return PersonRecord(self.graph, self.graph.person_index[person_id])
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` dictionary over a Graph: maps movie_ids to
+    a MovieRecord of title, year, stars (a set of person_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        return MovieRecord(self.graph, self.graph.movie_index[movie_id])
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` dictionary over a Graph: maps lowercased names
+    to a set of corresponding person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        people = graph.name_index.find_all(name)
+        if not people:
+            raise KeyError(name)
+        return {graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.person_names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
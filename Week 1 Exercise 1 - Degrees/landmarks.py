@@ -0,0 +1,92 @@
+from array import array
+
+import snapshot
+from graph import UNREACHABLE
+
+# Name of the landmark index written next to the CSV files
+FILENAME = "degrees.landmarks"
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few well-connected landmark people.
+
+    distances[i * n + p] is the number of degrees between landmark i and
+    person p, capped at UNREACHABLE - 1, where n is the number of people.
+    By the triangle inequality every landmark gives a lower bound
+    |d(L, s) - d(L, t)| and an upper bound d(L, s) + d(L, t) on d(s, t).
+    """
+
+    def __init__(self, landmarks=None, distances=None):
+        self.landmarks = array("i") if landmarks is None else landmarks
+        self.distances = array("B") if distances is None else distances
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Picks the `count` people with the most co-star credits as
+        landmarks and runs a BFS from each of them.
+        """
+        # A person's credits are the casts of their movies, minus
+        # themself; casts include credits added by ingest()
+        cast_sizes = array("i", (
+            len(graph.stars_of(movie)) for movie in range(len(graph.movie_ids))
+        ))
+        credits = array("i", bytes(4 * len(graph.person_ids)))
+        for person in range(len(graph.person_ids)):
+            for movie in graph.movies_of(person):
+                credits[person] += cast_sizes[movie] - 1
+
+        order = sorted(range(len(credits)), key=credits.__getitem__, reverse=True)
+        landmarks = array("i", order[:count])
+        distances = array("B")
+        for landmark in landmarks:
+            distances.extend(graph.bfs(landmark)[0])
+        return cls(landmarks, distances)
+
+    def save(self, path, stamp):
+        snapshot.write(path, {"landmarks": self.landmarks, "distances": self.distances}, stamp)
+
+    @classmethod
+    def load(cls, path, stamp):
+        """
+        Returns the index saved at `path`, or None if it is missing
+        or was built from other CSV files.
+        """
+        values = snapshot.read(path, stamp)
+        if values is None or "landmarks" not in values or "distances" not in values:
+            return None
+        return cls(values["landmarks"], values["distances"])
+
+    def _pairs(self, source, target):
+        # Yields (d(L, source), d(L, target)) for landmarks reaching both
+        if len(self.landmarks) == 0:
+            return
+        n = len(self.distances) // len(self.landmarks)
+        if source >= n or target >= n:
+            # People added since the index was built have no distances
+            return
+        for i in range(len(self.landmarks)):
+            a = self.distances[i * n + source]
+            b = self.distances[i * n + target]
+            if a != UNREACHABLE and b != UNREACHABLE:
+                yield a, b
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the degrees between interned people.
+        """
+        return max((abs(a - b) for a, b in self._pairs(source, target)), default=0)
+
+    def upper_bound(self, source, target):
+        """
+        Returns an upper bound on the degrees between interned people,
+        or None if no landmark reaches both.
+        """
+        # Saturated distances may be too small to bound from above
+        return min(
+            (a + b for a, b in self._pairs(source, target)
+             if a < UNREACHABLE - 1 and b < UNREACHABLE - 1),
+            default=None
+        )
+
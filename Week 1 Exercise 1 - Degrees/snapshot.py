@@ -0,0 +1,150 @@
+import json
+import mmap
+import os
+import sys
+
+from graph import StringTable
+
+# Name of the compiled snapshot written next to the CSV files
+FILENAME = "degrees.snapshot"
+
+# Bump whenever the set or layout of snapshot fields changes
+VERSION = 6
+
+MAGIC = b"DEGSNAP\0"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+ALIGNMENT = 8
+
+
+def source_stamp(directory):
+    """
+    Returns the [filename, mtime_ns, size] of each CSV file in
+    `directory`; a snapshot is only valid for an identical stamp.
+    """
+    stamp = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamp.append([name, stat.st_mtime_ns, stat.st_size])
+    return stamp
+
+
+def save(graph, path, stamp):
+    """
+    Writes every snapshot field of `graph` to `path`, first folding
+    in any rows added by ingest().
+    """
+    graph.compact()
+    write(path, {field: getattr(graph, field) for field in graph.SNAPSHOT_FIELDS}, stamp)
+
+
+def load(graph, path, stamp):
+    """
+    Memory-maps the snapshot at `path` into `graph`.
+
+    Returns False, leaving `graph` untouched, if the snapshot is
+    missing, from another version or was built from other CSV files.
+    """
+    values = read(path, stamp)
+    if values is None or any(field not in values for field in graph.SNAPSHOT_FIELDS):
+        return False
+
+    graph.clear()
+    for field in graph.SNAPSHOT_FIELDS:
+        setattr(graph, field, values[field])
+    graph.build_indexes()
+    return True
+
+
+def write(path, values, stamp):
+    """
+    Writes a dict of StringTables and flat arrays to `path`.
+
+    The file is MAGIC, an 8-byte header length, a JSON header
+    describing each section, then the raw sections, each aligned
+    to ALIGNMENT bytes.
+    """
+    # Flatten string tables into a blob and an offsets section
+    fields = {}
+    buffers = []
+    for field, value in values.items():
+        if isinstance(value, StringTable):
+            fields[field] = "strings"
+            buffers.append((f"{field}.blob", memoryview(value.blob).cast("B"), "B"))
+            buffers.append((f"{field}.offsets", memoryview(value.offsets), "q"))
+        else:
+            fields[field] = "array"
+            buffer = memoryview(value)
+            buffers.append((field, buffer, buffer.format))
+
+    # Lay the sections out relative to the end of the header
+    sections = {}
+    offset = 0
+    for name, buffer, typecode in buffers:
+        sections[name] = {"offset": offset, "size": buffer.nbytes, "typecode": typecode}
+        offset = _align(offset + buffer.nbytes)
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "stamp": stamp,
+        "fields": fields,
+        "sections": sections,
+    }
+    encoded = json.dumps(header).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(encoded))
+
+    # Write to a temporary file and swap it in so readers never
+    # see a partial snapshot
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, buffer, typecode in buffers:
+            f.write(bytes(base + sections[name]["offset"] - f.tell()))
+            f.write(buffer)
+    os.replace(temporary, path)
+
+
+def read(path, stamp):
+    """
+    Memory-maps the file at `path` written by write().
+
+    Returns a dict of StringTables and memoryviews over the mapping,
+    or None if the file is missing, from another version or was
+    written for a different stamp.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    start = len(MAGIC) + 8
+    length = int.from_bytes(buffer[len(MAGIC):start], "little")
+    try:
+        header = json.loads(bytes(buffer[start:start + length]))
+    except ValueError:
+        return None
+    if (header["version"] != VERSION or header["byteorder"] != sys.byteorder
+            or header["stamp"] != stamp):
+        return None
+    base = _align(start + length)
+
+    def section(name):
+        info = header["sections"][name]
+        begin = base + info["offset"]
+        return buffer[begin:begin + info["size"]].cast(info["typecode"])
+
+    values = {}
+    for field, kind in header["fields"].items():
+        if kind == "strings":
+            values[field] = StringTable(section(f"{field}.blob"), section(f"{field}.offsets"))
+        else:
+            values[field] = section(field)
+    return values
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -1,4 +1,11 @@
+import heapq
+from collections import Counter, OrderedDict, deque
+from itertools import count
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -7,13 +14,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = Counter()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] += 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +32,15 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._discard(node.state)
             return node
 
+    def _discard(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +48,63 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._discard(node.state)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first,
+    breaking ties in insertion order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self.states[node.state] += 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._discard(node.state)
             return node
+
+
+class LRUCache():
+    """
+    Mapping of at most `capacity` entries that evicts the least
+    recently used entry when full.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
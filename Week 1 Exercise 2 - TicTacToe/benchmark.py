@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def percentiles(samples):
+    """
+    Returns the p50, p90, p99 and max of a list of samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    result = {}
+    for p in (50, 90, 99):
+        result[f"p{p}"] = ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+    result["max"] = ordered[-1]
+    return result
+
+
+def engines(budget):
+    """
+    Returns the 3x3 engines to compare, each a function of (board, stats)
+    returning a move.
+    """
+    return {
+        "minimax": ttt.minimax,
+        "alphabeta": ttt.alphabeta,
+        "bitboard": bitboard.minimax,
+        "iterative_deepening": lambda board, stats: ttt.iterative_deepening(board, budget, stats=stats),
+        "table": ttt.minimax,
+    }
+
+
+def clear_caches():
+    """
+    Empties every table the engines fill as they search.
+    """
+    ttt.transposition_table.clear()
+    ttt.bound_table.clear()
+    bitboard.values.clear()
+
+
+def run_engines(boards, budget, warm):
+    """
+    Runs every engine on each board and returns, per engine, the search
+    counters summed over all boards, nodes per second and latency
+    percentiles in milliseconds. Caches are cleared before every search
+    unless warm, and only the "table" engine uses the perfect-play table.
+    Raises an error if any engine picks a move worth less than the table's.
+    """
+    table = bytes(ttt.build_table())
+
+    def value(board):
+        return (table[ttt.board_code(board)] >> 4) - 1
+    results = {}
+    for name, search in engines(budget).items():
+        ttt.perfect_play = table if name == "table" else None
+        clear_caches()
+        totals = {"nodes": 0, "terminals": 0, "cache_hits": 0, "max_depth": 0}
+        latencies = []
+        for board in boards:
+            if not warm:
+                clear_caches()
+            stats = {}
+            move = search(board, stats)
+            if value(ttt.result(board, move)) != value(board):
+                raise RuntimeError(f"{name} chose the suboptimal move {move} on {board}")
+            latencies.append(stats["seconds"] * 1000)
+            for key in ("nodes", "terminals", "cache_hits"):
+                totals[key] += stats[key]
+            totals["max_depth"] = max(totals["max_depth"], stats["max_depth"])
+        seconds = sum(latencies) / 1000
+        results[name] = {
+            **totals,
+            "seconds": seconds,
+            "nodes_per_sec": totals["nodes"] / seconds if seconds > 0 else None,
+            "latency_ms": percentiles(latencies),
+        }
+    ttt.perfect_play = None
+    return results
+
+
+def positions(rows, columns, k, count, seed):
+    """
+    Returns count boards that are not over, each reached by a few random
+    moves from the empty board, the same ones for the same seed.
+    """
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = ttt.initial_state(rows, columns)
+        for _ in range(rng.randrange(0, 4)):
+            board = ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+        if not ttt.terminal(board, k):
+            boards.append(board)
+    return boards
+
+
+def reachable_positions():
+    """
+    Returns every reachable 3x3 board that is not over, in board_code() order.
+    """
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code = ttt.board_code(board)
+        if code in boards or ttt.terminal(board):
+            continue
+        boards[code] = board
+        frontier.extend(ttt.result(board, action) for action in ttt.actions(board))
+    return [boards[code] for code in sorted(boards)]
+
+
+def check_alphabeta(seed):
+    """
+    Runs alphabeta() on every reachable 3x3 position in a shuffled order, so that
+    most searches start from tables filled by earlier ones, and raises an error
+    unless it picks the same move as minimax() does with empty tables.
+    """
+    boards = reachable_positions()
+    expected = []
+    for board in boards:
+        clear_caches()
+        expected.append(ttt.minimax(board))
+
+    clear_caches()
+    order = list(range(len(boards)))
+    random.Random(seed).shuffle(order)
+    for i in order:
+        move = ttt.alphabeta(boards[i])
+        if move != expected[i]:
+            raise RuntimeError(f"alphabeta chose {move} instead of {expected[i]} on {boards[i]}")
+    clear_caches()
+    return len(boards)
+
+
+def run_parallel(boards, depth, k, worker_counts):
+    """
+    Runs parallel_search on every board with each number of workers and
+    returns the total seconds and the speedup over the first worker count.
+    Raises an error if any worker count picks a different move.
+    """
+    results = {}
+    moves = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        found = [ttt.parallel_search(board, depth, k, workers) for board in boards]
+        seconds = time.perf_counter() - start
+        if moves is None:
+            moves = found
+            baseline = seconds
+        elif found != moves:
+            raise RuntimeError(f"{workers} workers chose different moves")
+        results[workers] = {"seconds": seconds, "speedup": baseline / seconds}
+    return results
+
+
+def write_report(report, path):
+    """
+    Prints report as JSON, or writes it to path if given.
+    """
+    if path is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how parallel_search scales with the number of worker processes, "
+                    "or compare the 3x3 engines with --engines."
+    )
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--columns", type=int, default=4)
+    parser.add_argument("-k", type=int, default=4, help="marks in a row needed to win")
+    parser.add_argument("--depth", type=int, default=6, help="moves searched from each position")
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="worker counts to compare (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--engines", action="store_true",
+                        help="report nodes/sec and latency of each engine on 3x3 positions")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds for iterative deepening with --engines")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep engine caches between positions with --engines")
+    parser.add_argument("--check", action="store_true",
+                        help="check warm-table alphabeta against minimax on every 3x3 position")
+    args = parser.parse_args()
+
+    if args.check:
+        print(f"alphabeta matches minimax on {check_alphabeta(args.seed)} positions")
+        return
+
+    if args.engines:
+        boards = positions(3, 3, 3, args.positions, args.seed)
+        report = {
+            "positions": len(boards),
+            "warm": args.warm,
+            "engines": run_engines(boards, args.budget, args.warm),
+        }
+        write_report(report, args.output)
+        return
+
+    worker_counts = args.workers
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+
+    boards = positions(args.rows, args.columns, args.k, args.positions, args.seed)
+    report = {
+        "board": [args.rows, args.columns, args.k],
+        "depth": args.depth,
+        "positions": len(boards),
+        "cpus": os.cpu_count(),
+        "workers": run_parallel(boards, args.depth, args.k, worker_counts),
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
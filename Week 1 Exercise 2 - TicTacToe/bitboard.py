@@ -0,0 +1,169 @@
+"""
+Tic Tac Toe engine on bitboards
+
+A position is a pair (x, o) of 9-bit integers with bit i * 3 + j set
+where that player has a mark in cell (i, j).
+"""
+
+from tictactoe import X, O, EMPTY, count, instrumented
+
+FULL = 0b111111111
+
+# Every row, column and diagonal as a bit mask
+WIN_MASKS = tuple(
+    sum(1 << (i * 3 + j) for i, j in line)
+    for line in (
+        [[(i, j) for j in range(3)] for i in range(3)]
+        + [[(i, j) for i in range(3)] for j in range(3)]
+        + [[(i, i) for i in range(3)], [(i, 2 - i) for i in range(3)]]
+    )
+)
+
+# WINS[bits] is True if the marks in bits cover a whole line
+WINS = tuple(any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1))
+
+# Cells in the order moves are tried: center, then corners, then edges,
+# the same order as tictactoe.ordered_actions()
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Minimax value of every position searched so far, keyed by x | o << 9
+values = {}
+
+def from_board(board):
+    """
+    Returns the (x, o) position of a 3x3 list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (i * 3 + j)
+            elif board[i][j] == O:
+                o |= 1 << (i * 3 + j)
+    return x, o
+
+def to_board(position):
+    """
+    Returns the 3x3 list board of an (x, o) position.
+    """
+    x, o = position
+    return [[X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+def player(position):
+    """
+    Returns the player who has the next turn: X unless X has more marks.
+    """
+    x, o = position
+    return O if x.bit_count() > o.bit_count() else X
+
+def actions(position):
+    """
+    Returns the empty cells of the position, as bit indices in MOVE_ORDER.
+    """
+    x, o = position
+    occupied = x | o
+    return [cell for cell in MOVE_ORDER if not occupied >> cell & 1]
+
+def result(position, cell):
+    """
+    Returns the position after the player to move marks the cell with bit index cell.
+    """
+    x, o = position
+    if not 0 <= cell < 9:
+        raise ValueError("Action is out of bounds.")
+    if (x | o) >> cell & 1:
+        raise ValueError(f"Cell ({cell // 3}, {cell % 3}) is already occupied.")
+    if x.bit_count() > o.bit_count():
+        return x, o | 1 << cell
+    return x | 1 << cell, o
+
+def winner(position):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = position
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+def terminal(position):
+    """
+    Returns True if a player has won or the board is full.
+    """
+    x, o = position
+    return WINS[x] or WINS[o] or x | o == FULL
+
+def utility(position):
+    """
+    Returns 1 if X has won, -1 if O has won, 0 otherwise.
+    """
+    x, o = position
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+def value(x, o, stats=None):
+    """
+    Returns the minimax value of the position (x, o) for X.
+    If stats is a dict, the counters of tictactoe.instrumented() are updated in it.
+    """
+    occupied = x | o
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + 1
+        stats["max_depth"] = max(stats.get("max_depth", 0), occupied.bit_count())
+    if WINS[x] or WINS[o] or occupied == FULL:
+        count(stats, "terminals")
+        return 1 if WINS[x] else -1 if WINS[o] else 0
+
+    key = x | o << 9
+    if key in values:
+        count(stats, "cache_hits")
+        return values[key]
+
+    # X moves whenever both players have the same number of marks
+    if x.bit_count() == o.bit_count():
+        best = -1
+        for cell in MOVE_ORDER:
+            if not occupied >> cell & 1:
+                best = max(best, value(x | 1 << cell, o, stats))
+                if best == 1:
+                    break
+    else:
+        best = 1
+        for cell in MOVE_ORDER:
+            if not occupied >> cell & 1:
+                best = min(best, value(x, o | 1 << cell, stats))
+                if best == -1:
+                    break
+    values[key] = best
+    return best
+
+def best_move(position, stats=None):
+    """
+    Returns the bit index of the optimal move for the player to move,
+    or None if the game is over. Ties go to the first best cell in MOVE_ORDER.
+    """
+    if terminal(position):
+        return None
+    maximizing = player(position) == X
+    best_cell = None
+    best_value = None
+    for cell in actions(position):
+        child = result(position, cell)
+        child_value = value(*child, stats)
+        if (best_value is None or (maximizing and child_value > best_value)
+                or (not maximizing and child_value < best_value)):
+            best_cell = cell
+            best_value = child_value
+    return best_cell
+
+@instrumented
+def minimax(board, stats=None):
+    """
+    Returns the optimal action (i, j) on a 3x3 list board, as tictactoe.minimax() does.
+    If stats is a dict, it receives the search counters of tictactoe.instrumented().
+    """
+    cell = best_move(from_board(board), stats)
+    return None if cell is None else divmod(cell, 3)
@@ -1,9 +1,31 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
 
+# Board shape and marks in a row needed to win: python runner.py [ROWS COLUMNS K]
+rows, columns, k = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 3 else (3, 3, 3)
+
+# Seconds the computer may think on boards too large to search fully
+budget = 1.0
+
+# Shortest time the computer appears to think, so its move is not instant
+min_think_time = 0.5
+
+# Frames drawn per second, also while the computer is thinking
+fps = 30
+
+# Load the perfect-play table, building it on the first run
+if not ttt.load_table(ttt.TABLE_FILE):
+    try:
+        ttt.save_table(ttt.TABLE_FILE)
+    except OSError:
+        # Without a table the computer falls back to searching
+        pass
+    ttt.load_table(ttt.TABLE_FILE)
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -17,14 +39,43 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+
+def think(board, cancel, moves):
+    """
+    Searches for the computer's move on board and appends it to moves,
+    unless cancel is set before the search ends.
+    """
+    if (rows, columns, k) == (3, 3, 3):
+        move = ttt.minimax(board)
+    else:
+        move = ttt.iterative_deepening(board, budget, k, cancel=cancel)
+    if not cancel.is_set():
+        moves.append(move)
+
+
+def cancel_search():
+    """
+    Abandons the computer's search, if one is running.
+    """
+    global search
+    if search is not None:
+        search["cancel"].set()
+        search = None
+
+
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(rows, columns)
+
+# The computer's search in the background: its cancellation token, start
+# time, and the list its move is appended to once found
+search = None
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_search()
             sys.exit()
 
     screen.fill(black)
@@ -66,14 +117,14 @@ while True:
 
     else:
 
-        # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        # Draw game board, keeping its bottom edge above the Play Again button
+        tile_size = min(80, 260 // max(rows, columns))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,12 +140,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
+        game_over = ttt.terminal(board, k)
         player = ttt.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = ttt.winner(board, k)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,32 +153,37 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            # Animate the dots while the search runs in the background
+            title = "Computer thinking" + "." * (int(time.time() * 3) % 4)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searching in a background thread so the
+        # window keeps redrawing
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if search is None:
+                search = {"cancel": threading.Event(), "start": time.time(), "moves": []}
+                threading.Thread(
+                    target=think, args=(board, search["cancel"], search["moves"]), daemon=True
+                ).start()
+            elif search["moves"] and time.time() - search["start"] >= min_think_time:
+                board = ttt.result(board, search["moves"][0])
+                search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
+        # Offer a new game once this one is over, or to abandon the
+        # computer's search
+        if game_over or search is not None:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
             again = mediumFont.render("Play Again", True, black)
             againRect = again.get_rect()
@@ -139,8 +195,9 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_search()
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.initial_state(rows, columns)
 
     pygame.display.flip()
+    clock.tick(fps)
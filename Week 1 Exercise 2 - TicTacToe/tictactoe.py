@@ -2,20 +2,206 @@
 Tic Tac Toe Player
 """
 
+import inspect
 import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, wraps
+from itertools import repeat
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Rank of each cell of the 3x3 board when ordering moves: center, then
+# corners, then edges. Larger boards order moves by distance from the center
+MOVE_RANKS = {(i, j): 0 if (i, j) == (1, 1) else 1 if i != 1 and j != 1 else 2
+              for i in range(3) for j in range(3)}
+
+# Minimax value of every position searched so far, keyed by
+# canonical(board, k) and kept for the lifetime of the process
+transposition_table = {}
+
+# (lower, upper) bounds on the value of positions that alpha-beta
+# searched with a window too narrow to find their exact value
+bound_table = {}
+
+# File holding the value and best move of every reachable 3x3 position
+TABLE_FILE = "tictactoe.table"
+TABLE_MAGIC = b"TTTPLAY1"
+
+# Table entry of a position that cannot be reached, and move stored for
+# positions where the game is over
+UNREACHABLE = 0xFF
+NO_MOVE = 0xF
+
+# Perfect-play table loaded by load_table(), indexed by board_code(board):
+# each byte holds (value + 1) << 4 | (i * 3 + j) for the best move (i, j)
+perfect_play = None
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a budgeted search when its deadline has passed or it was cancelled.
+    """
+
+def initial_state(m=3, n=3):
     """
-    Returns the starting state of the board as a 3x3 grid.
+    Returns the starting state of the board as an m x n grid, 3x3 by default.
     The grid is initialized with all cells being EMPTY.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(m)]
+
+@lru_cache(maxsize=None)
+def winning_lines(m, n, k):
+    """
+    Returns every run of k cells in a row, column or diagonal of an m x n board,
+    each as a tuple of (i, j) cells.
+    """
+    lines = []
+    for i in range(m):
+        for j in range(n):
+            # Runs starting at (i, j) going right, down, down-right and down-left
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i = i + di * (k - 1)
+                end_j = j + dj * (k - 1)
+                if 0 <= end_i < m and 0 <= end_j < n:
+                    lines.append(tuple((i + di * step, j + dj * step) for step in range(k)))
+    return tuple(lines)
+
+@lru_cache(maxsize=None)
+def symmetries(m, n):
+    """
+    Returns the rotations and reflections of an m x n board: 8 if it is square,
+    otherwise 4. Each is given as the cell, numbered i * n + j, that moves to
+    each position of the transformed board.
+    """
+    transforms = [
+        lambda i, j: (i, j),                  # Identity
+        lambda i, j: (m - 1 - i, n - 1 - j),  # Half turn
+        lambda i, j: (i, n - 1 - j),          # Left-right mirror
+        lambda i, j: (m - 1 - i, j),          # Top-bottom mirror
+    ]
+    if m == n:
+        transforms += [
+            lambda i, j: (j, n - 1 - i),          # Quarter turn
+            lambda i, j: (n - 1 - j, i),          # Three-quarter turn
+            lambda i, j: (j, i),                  # Main diagonal mirror
+            lambda i, j: (n - 1 - j, n - 1 - i),  # Anti-diagonal mirror
+        ]
+    return tuple(
+        tuple(n * a + b for a, b in (transform(i, j) for i in range(m) for j in range(n)))
+        for transform in transforms
+    )
+
+class GameState():
+    """
+    A position being searched, changed in place: push(action) plays a move and
+    pop() takes back the last one. The mark counts, and with them the side to
+    move, and the winner are updated incrementally rather than recomputed from
+    the board, and only the lines through the new mark are checked for a win.
+    """
+
+    def __init__(self, board, k=3):
+        self.board = [row[:] for row in board]
+        self.k = k
+        self.x_count = sum(row.count(X) for row in board)
+        self.o_count = sum(row.count(O) for row in board)
+        self.winner = winner(board, k)
+
+        # Actions played by push(), each with the winner before it
+        self.history = []
+
+    def moves(self):
+        """
+        Returns the number of marks on the board.
+        """
+        return self.x_count + self.o_count
+
+    def player(self):
+        """
+        Returns the player to move: O if X has more marks, otherwise X.
+        """
+        return O if self.x_count > self.o_count else X
+
+    def actions(self):
+        """
+        Returns the set of empty cells (i, j).
+        """
+        return actions(self.board)
+
+    def terminal(self):
+        """
+        Returns True if a player has won or the board is full.
+        """
+        return self.winner is not None or self.moves() == len(self.board) * len(self.board[0])
+
+    def utility(self):
+        """
+        Returns 1 if X has won, -1 if O has won, 0 otherwise.
+        """
+        return 1 if self.winner == X else -1 if self.winner == O else 0
+
+    def push(self, action):
+        """
+        Makes the move (i, j) for the player to move.
+        Raises ValueError if the cell is out of bounds or already occupied.
+        """
+        i, j = action
+
+        # Check if the action is out of bounds
+        if i < 0 or i >= len(self.board) or j < 0 or j >= len(self.board[0]):
+            raise ValueError("Action is out of bounds.")
+
+        # If the cell is not empty, raise an error (invalid move)
+        if self.board[i][j] != EMPTY:
+            raise ValueError(f"Cell ({i}, {j}) is already occupied.")
+
+        mark = self.player()
+        self.board[i][j] = mark
+        if mark == X:
+            self.x_count += 1
+        else:
+            self.o_count += 1
+        self.history.append((action, self.winner))
+        if self.winner is None and self.completes_line(i, j):
+            self.winner = mark
+
+    def pop(self):
+        """
+        Takes back the last move made with push().
+        """
+        (i, j), self.winner = self.history.pop()
+        if self.board[i][j] == X:
+            self.x_count -= 1
+        else:
+            self.o_count -= 1
+        self.board[i][j] = EMPTY
+
+    def completes_line(self, i, j):
+        """
+        Returns True if the mark at (i, j) is part of k in a row.
+        """
+        mark = self.board[i][j]
+        m, n = len(self.board), len(self.board[0])
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            # Count matching marks on both sides of (i, j)
+            run = 1
+            for sign in (1, -1):
+                a, b = i + sign * di, j + sign * dj
+                while 0 <= a < m and 0 <= b < n and self.board[a][b] == mark:
+                    run += 1
+                    a, b = a + sign * di, b + sign * dj
+            if run >= self.k:
+                return True
+        return False
+
+def as_state(board, k=3):
+    """
+    Returns board itself if it is already a GameState, otherwise a new GameState
+    of the board, so that the search functions accept either.
+    """
+    return board if isinstance(board, GameState) else GameState(board, k)
 
 def player(board):
     """
@@ -29,10 +215,7 @@ def player(board):
     o_count = sum(row.count(O) for row in board)
 
     # If there are more X's, it's O's turn, otherwise it's X's turn
-    if x_count > o_count:
-        return O
-    else:
-        return X
+    return O if x_count > o_count else X
 
 def actions(board):
     """
@@ -44,8 +227,8 @@ def actions(board):
     actions_set = set()
 
     # Iterate over the board and add valid actions (empty spaces) to the set
-    for i in range(3):
-        for j in range(3):
+    for i in range(len(board)):
+        for j in range(len(board[i])):
             if board[i][j] == EMPTY:
                 actions_set.add((i, j))
 
@@ -62,85 +245,298 @@ def result(board, action):
     i, j = action
 
     # Check if the action is out of bounds
-    if i < 0 or i >= 3 or j < 0 or j >= 3:
+    if i < 0 or i >= len(board) or j < 0 or j >= len(board[0]):
         raise ValueError("Action is out of bounds.")
 
     # If the cell is not empty, raise an error (invalid move)
     if board[i][j] != EMPTY:
         raise ValueError(f"Cell ({i}, {j}) is already occupied.")
 
-    # Create a new board (deep copy of the original)
+    # Make the move on a new board (deep copy of the original)
     new_board = [row[:] for row in board]
-
-    # Determine the current player
-    current_player = player(board)
-
-    # Make the move on the new board
-    new_board[i][j] = current_player
+    new_board[i][j] = player(board)
     return new_board
 
-def winner(board):
+def winner(board, k=3):
     """
     Returns the winner of the game if there is one.
-    A winner is determined by checking all rows, columns, and diagonals.
+    A winner has k marks in a row, column, or diagonal; with the default k=3
+    on a 3x3 board that is a whole row, column, or diagonal.
     If there is no winner, it returns None.
     """
-    # Check each row and column for a winning combination
-    for i in range(3):
-        # Check row
-        if board[i][0] == board[i][1] == board[i][2] != EMPTY:
-            return board[i][0]
-        # Check column
-        if board[0][i] == board[1][i] == board[2][i] != EMPTY:
-            return board[0][i]
-
-    # Check the diagonals for a winning combination
-    if board[0][0] == board[1][1] == board[2][2] != EMPTY:
-        return board[0][0]
-    if board[0][2] == board[1][1] == board[2][0] != EMPTY:
-        return board[0][2]
+    if k == 3 and len(board) == 3 and len(board[0]) == 3:
+        # Check each row and column for a winning combination
+        for i in range(3):
+            # Check row
+            if board[i][0] == board[i][1] == board[i][2] != EMPTY:
+                return board[i][0]
+            # Check column
+            if board[0][i] == board[1][i] == board[2][i] != EMPTY:
+                return board[0][i]
+
+        # Check the diagonals for a winning combination
+        if board[0][0] == board[1][1] == board[2][2] != EMPTY:
+            return board[0][0]
+        if board[0][2] == board[1][1] == board[2][0] != EMPTY:
+            return board[0][2]
+        return None
 
+    # Check every run of k cells for a winning combination
+    for line in winning_lines(len(board), len(board[0]), k):
+        i, j = line[0]
+        mark = board[i][j]
+        if mark == EMPTY:
+            continue
+        for i, j in line:
+            if board[i][j] != mark:
+                break
+        else:
+            return mark
     return None
 
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if the game is over, either because a player has won or the board is full (tie).
     If the game is still in progress, returns False.
     """
     # Check if there is a winner or if all cells are filled (indicating a tie)
-    return winner(board) is not None or all(board[i][j] != EMPTY for i in range(3) for j in range(3))
+    return winner(board, k) is not None or all(EMPTY not in row for row in board)
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns the utility value of the board if the game is over.
     If X wins, return 1; if O wins, return -1; if it's a tie, return 0.
     """
-    if winner(board) == X:
-        return 1  # X wins
-    elif winner(board) == O:
-        return -1  # O wins
-    return 0  # Tie
+    mark = winner(board, k)
+    return 1 if mark == X else -1 if mark == O else 0
+
+def evaluate(board, k=3):
+    """
+    Returns a heuristic value strictly between -1 and 1 for a board that is not over,
+    estimating utility(): positive when X is closer to winning.
+
+    Every run of k cells that only one player has marked counts for that player,
+    more the more marks they already have in it.
+    """
+    lines = winning_lines(len(board), len(board[0]), k)
+    score = 0
+    for line in lines:
+        marks = [board[i][j] for i, j in line]
+        x_count = marks.count(X)
+        o_count = marks.count(O)
+        if o_count == 0 and x_count > 0:
+            score += 3 ** x_count
+        elif x_count == 0 and o_count > 0:
+            score -= 3 ** o_count
+
+    # Squash the score so any real win or loss outranks it
+    return score / (abs(score) + len(lines))
+
+def canonical(board, k=3):
+    """
+    Returns a key shared by the board and all its rotations and reflections,
+    which have the same minimax value when playing for k in a row.
+    """
+    m, n = len(board), len(board[0])
+    codes = [0 if cell == EMPTY else 1 if cell == X else 2 for row in board for cell in row]
+
+    # Read each transformed board as a base-3 number and keep the smallest
+    return m, n, k, min(
+        sum(codes[cell] * 3 ** position for position, cell in enumerate(symmetry))
+        for symmetry in symmetries(m, n)
+    )
+
+def ordered_actions(board, killer=None):
+    """
+    Returns the possible actions on the board as a list in a fixed order:
+    the killer move first if it is legal, then center, corners and edges on
+    a 3x3 board, or nearest the center first on other boards.
+    Moves that tend to be strong come first so alpha-beta can prune sooner.
+    """
+    m, n = len(board), len(board[0])
+
+    def rank(action):
+        if (m, n) == (3, 3):
+            return MOVE_RANKS[action]
+        i, j = action
+        return (2 * i - m + 1) ** 2 + (2 * j - n + 1) ** 2
+
+    return sorted(actions(board), key=lambda action: (action != killer, rank(action), action))
+
+def board_code(board):
+    """
+    Returns the 3x3 board read as a base-3 number, with EMPTY as 0, X as 1 and O as 2,
+    and cell (i, j) as digit i * 3 + j.
+    """
+    code = 0
+    for cell in reversed([cell for row in board for cell in row]):
+        code = code * 3 + (0 if cell == EMPTY else 1 if cell == X else 2)
+    return code
+
+def build_table():
+    """
+    Returns the perfect-play table of every position reachable on a 3x3 board.
+
+    Positions are enumerated forwards one move at a time, then solved backwards
+    from the last move: each position takes the best value among its children,
+    which are already solved. Ties go to the first best move in ordered_actions()
+    order, as in minimax().
+    """
+    # Enumerate the reachable positions, grouped by number of moves played
+    levels = [[initial_state()]]
+    seen = {board_code(levels[0][0])}
+    for _ in range(9):
+        level = []
+        for board in levels[-1]:
+            if terminal(board):
+                continue
+            for action in actions(board):
+                child = result(board, action)
+                code = board_code(child)
+                if code not in seen:
+                    seen.add(code)
+                    level.append(child)
+        levels.append(level)
+
+    # Solve the levels from the last move back to the empty board
+    table = bytearray([UNREACHABLE]) * 3 ** 9
+    for level in reversed(levels):
+        for board in level:
+            if terminal(board):
+                table[board_code(board)] = (utility(board) + 1) << 4 | NO_MOVE
+                continue
+            maximizing = player(board) == X
+            best_value = None
+            best_move = None
+            for action in ordered_actions(board):
+                value = (table[board_code(result(board, action))] >> 4) - 1
+                if (best_value is None or (maximizing and value > best_value)
+                        or (not maximizing and value < best_value)):
+                    best_value = value
+                    best_move = action
+            i, j = best_move
+            table[board_code(board)] = (best_value + 1) << 4 | (i * 3 + j)
+    return table
+
+def save_table(path=TABLE_FILE):
+    """
+    Builds the perfect-play table and writes it to path.
+    """
+    table = build_table()
+    with open(path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(table)
+
+def load_table(path=TABLE_FILE):
+    """
+    Loads the perfect-play table written by save_table() so that searches on 3x3
+    boards become lookups. Returns False if the file is missing or invalid.
+    """
+    global perfect_play
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return False
+    if data[:len(TABLE_MAGIC)] != TABLE_MAGIC or len(data) != len(TABLE_MAGIC) + 3 ** 9:
+        return False
+    perfect_play = data[len(TABLE_MAGIC):]
+    return True
+
+def lookup(board, k=3):
+    """
+    Returns (value, action) for the board from the perfect-play table, with action
+    None if the game is over. Returns None if no table is loaded or the board is not
+    a reachable 3x3 position with k=3.
+    """
+    if perfect_play is None or k != 3 or len(board) != 3 or any(len(row) != 3 for row in board):
+        return None
+    entry = perfect_play[board_code(board)]
+    if entry == UNREACHABLE:
+        return None
+    cell = entry & NO_MOVE
+    return (entry >> 4) - 1, None if cell == NO_MOVE else divmod(cell, 3)
 
-def minimax(board):
+def instrumented(search):
+    """
+    Decorates a top-level search taking board and stats arguments. When stats is
+    a dict, it is reset and the search fills in:
+    nodes: positions visited below the board
+    terminals: of those, positions where the game was over
+    cache_hits: values taken from the perfect-play, transposition or bound tables
+    max_depth: most moves ahead of the board that were visited
+    seconds: wall-clock time of the search
+    Without stats the search runs with no counting overhead.
+    """
+    signature = inspect.signature(search)
+
+    @wraps(search)
+    def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        stats = arguments.get("stats")
+        if stats is None:
+            return search(*args, **kwargs)
+
+        # Searches record the most marks on any board they visit
+        root = as_state(arguments["board"]).moves()
+        stats.update(nodes=0, terminals=0, cache_hits=0, max_depth=root)
+        start = time.perf_counter()
+        try:
+            return search(*args, **kwargs)
+        finally:
+            stats["seconds"] = time.perf_counter() - start
+            stats["max_depth"] -= root
+
+    return wrapper
+
+def visit(stats, state):
+    """
+    Counts a visit to state in stats.
+    """
+    stats["nodes"] = stats.get("nodes", 0) + 1
+    if state.moves() > stats.get("max_depth", 0):
+        stats["max_depth"] = state.moves()
+
+def count(stats, key):
+    """
+    Adds one to stats[key] if stats is a dict.
+    """
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + 1
+
+@instrumented
+def minimax(board, stats=None, k=3):
     """
     Returns the optimal action for the current player (X or O) on the board.
     The function uses Minimax to evaluate the best possible move.
     It recursively explores the game tree and chooses the move that maximizes the score
     for the current player (X) and minimizes the score for the opponent (O).
+
+    Ties go to the first best move in ordered_actions() order. If stats is a dict,
+    it receives the search counters described in instrumented().
+
+    With a perfect-play table loaded, 3x3 boards are answered by lookup() instead.
     """
-    if terminal(board):
+    state = as_state(board, k)
+    entry = lookup(state.board, state.k)
+    if entry is not None:
+        count(stats, "cache_hits")
+        return entry[1]
+
+    if state.terminal():
         return None  # No move possible if the game is over
 
-    current_player = player(board)
+    current_player = state.player()
 
     if current_player == X:
         # Maximizing for X
         best_value = -math.inf
         best_move = None
         # Evaluate each possible move for X
-        for action in actions(board):
-            new_board = result(board, action)
-            value = min_value(new_board)  # Evaluate from O's perspective
+        for action in ordered_actions(state.board):
+            state.push(action)
+            value = min_value(state, stats)  # Evaluate from O's perspective
+            state.pop()
             if value > best_value:
                 best_value = value
                 best_move = action
@@ -150,40 +546,367 @@ def minimax(board):
         best_value = math.inf
         best_move = None
         # Evaluate each possible move for O
-        for action in actions(board):
-            new_board = result(board, action)
-            value = max_value(new_board)  # Evaluate from X's perspective
+        for action in ordered_actions(state.board):
+            state.push(action)
+            value = max_value(state, stats)  # Evaluate from X's perspective
+            state.pop()
             if value < best_value:
                 best_value = value
                 best_move = action
         return best_move
 
-def max_value(board):
+def max_value(board, stats=None, k=3):
     """
     Returns the maximum value for the current board (for X).
     It recursively evaluates all possible moves, maximizing the value for X.
     """
-    if terminal(board):
-        return utility(board)  # Return the utility if the game is over
+    state = as_state(board, k)
+    if stats is not None:
+        visit(stats, state)
+    if state.terminal():
+        count(stats, "terminals")
+        return state.utility()  # Return the utility if the game is over
+
+    # Reuse the value of this position or any symmetric one
+    entry = lookup(state.board, state.k)
+    if entry is not None:
+        count(stats, "cache_hits")
+        return entry[0]
+    key = canonical(state.board, state.k)
+    if key in transposition_table:
+        count(stats, "cache_hits")
+        return transposition_table[key]
 
     value = -math.inf
     # Explore all actions for X and take the maximum value
-    for action in actions(board):
-        new_board = result(board, action)
-        value = max(value, min_value(new_board))  # Explore O's response
+    for action in state.actions():
+        state.push(action)
+        value = max(value, min_value(state, stats))  # Explore O's response
+        state.pop()
+    transposition_table[key] = value
     return value
 
-def min_value(board):
+def min_value(board, stats=None, k=3):
     """
     Returns the minimum value for the current board (for O).
     It recursively evaluates all possible moves, minimizing the value for O.
     """
-    if terminal(board):
-        return utility(board)  # Return the utility if the game is over
+    state = as_state(board, k)
+    if stats is not None:
+        visit(stats, state)
+    if state.terminal():
+        count(stats, "terminals")
+        return state.utility()  # Return the utility if the game is over
+
+    # Reuse the value of this position or any symmetric one
+    entry = lookup(state.board, state.k)
+    if entry is not None:
+        count(stats, "cache_hits")
+        return entry[0]
+    key = canonical(state.board, state.k)
+    if key in transposition_table:
+        count(stats, "cache_hits")
+        return transposition_table[key]
 
     value = math.inf
     # Explore all actions for O and take the minimum value
-    for action in actions(board):
-        new_board = result(board, action)
-        value = min(value, max_value(new_board))  # Explore X's response
+    for action in state.actions():
+        state.push(action)
+        value = min(value, max_value(state, stats))  # Explore X's response
+        state.pop()
+    transposition_table[key] = value
+    return value
+
+@instrumented
+def alphabeta(board, stats=None, k=3):
+    """
+    Returns the same optimal action as minimax(board), found with alpha-beta pruning.
+    Children are searched in ordered_actions() order, trying first the killer move:
+    the last move that caused a cutoff at the same depth.
+
+    If stats is a dict, it receives the search counters described in instrumented().
+    """
+    state = as_state(board, k)
+    entry = lookup(state.board, state.k)
+    if entry is not None:
+        count(stats, "cache_hits")
+        return entry[1]
+
+    if state.terminal():
+        return None  # No move possible if the game is over
+
+    killers = {}
+    maximizing = state.player() == X
+    alpha = -math.inf
+    beta = math.inf
+    best_move = None
+
+    # Only a strictly better move narrows the window, so ties go to the first
+    # best move as in minimax()
+    for action in ordered_actions(state.board):
+        state.push(action)
+        value = alphabeta_value(state, alpha, beta, killers, stats)
+        state.pop()
+        if maximizing and value > alpha:
+            alpha = value
+            best_move = action
+        elif not maximizing and value < beta:
+            beta = value
+            best_move = action
+    return best_move
+
+def alphabeta_value(board, alpha, beta, killers, stats=None, k=3):
+    """
+    Returns the minimax value of the board if it lies strictly between alpha and beta.
+    Otherwise returns a bound: at most alpha, or at least beta.
+
+    killers maps the number of moves played to the last action that caused a cutoff there.
+    """
+    state = as_state(board, k)
+    if stats is not None:
+        visit(stats, state)
+    if state.terminal():
+        count(stats, "terminals")
+        return state.utility()  # Return the utility if the game is over
+
+    # Exact values are valid for any window, bounds may narrow it
+    entry = lookup(state.board, state.k)
+    if entry is not None:
+        count(stats, "cache_hits")
+        return entry[0]
+    key = canonical(state.board, state.k)
+    if key in transposition_table:
+        count(stats, "cache_hits")
+        return transposition_table[key]
+    window = (alpha, beta)
+    lower, upper = bound_table.get(key, (-math.inf, math.inf))
+    if lower >= beta or upper <= alpha:
+        count(stats, "cache_hits")
+        return lower if lower >= beta else upper
+    alpha = max(alpha, lower)
+    beta = min(beta, upper)
+    if alpha >= beta:
+        # The bounds have met, so lower is the exact value; searching an
+        # empty window would cut off after one child and return a wrong value
+        count(stats, "cache_hits")
+        return lower
+
+    depth = state.moves()
+    if state.player() == X:
+        value = -math.inf
+        for action in ordered_actions(state.board, killers.get(depth)):
+            state.push(action)
+            value = max(value, alphabeta_value(state, alpha, beta, killers, stats))
+            state.pop()
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                # O would never allow this position, so skip X's other moves
+                killers[depth] = action
+                break
+    else:
+        value = math.inf
+        for action in ordered_actions(state.board, killers.get(depth)):
+            state.push(action)
+            value = min(value, alphabeta_value(state, alpha, beta, killers, stats))
+            state.pop()
+            beta = min(beta, value)
+            if alpha >= beta:
+                # X would never allow this position, so skip O's other moves
+                killers[depth] = action
+                break
+
+    # A value outside the original window is only a bound
+    if value <= window[0]:
+        bound_table[key] = (lower, min(upper, value))
+    elif value >= window[1]:
+        bound_table[key] = (max(lower, value), upper)
+    else:
+        transposition_table[key] = value
     return value
+
+@instrumented
+def iterative_deepening(board, budget, k=3, stats=None, cancel=None):
+    """
+    Returns the best action found within budget seconds by alpha-beta searches
+    1, 2, 3, ... moves deep, for boards too large to search to the end.
+    Positions at the depth limit are scored with evaluate().
+
+    Each depth searches the previous best move first, and the move from the
+    deepest search that finished is returned. Once a search reaches the end
+    of the game, its move is optimal. If stats is a dict, it receives the search
+    counters described in instrumented(), and the deepest finished depth under "depth".
+
+    cancel is an optional threading.Event; setting it from another thread stops
+    the search as if the budget had run out.
+    """
+    state = as_state(board, k)
+    if state.terminal():
+        return None  # No move possible if the game is over
+
+    deadline = time.perf_counter() + budget
+    if stats is not None:
+        stats["depth"] = 0
+    maximizing = state.player() == X
+    moves = ordered_actions(state.board)
+    best_move = moves[0]
+
+    for depth in range(1, len(moves) + 1):
+        killers = {}
+        alpha = -math.inf
+        beta = math.inf
+        depth_move = None
+        try:
+            for action in moves:
+                state.push(action)
+                try:
+                    value = depth_limited_value(
+                        state, depth - 1, alpha, beta, killers, deadline, stats=stats, cancel=cancel
+                    )
+                finally:
+                    state.pop()
+                if maximizing and value > alpha:
+                    alpha = value
+                    depth_move = action
+                elif not maximizing and value < beta:
+                    beta = value
+                    depth_move = action
+        except SearchTimeout:
+            break
+
+        best_move = depth_move
+        if stats is not None:
+            stats["depth"] = depth
+
+        # Try the best move first at the next depth
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+
+        # Stop early once the outcome is decided either way
+        if (alpha if maximizing else beta) in (1, -1):
+            break
+
+    return best_move
+
+def depth_limited_value(board, depth, alpha, beta, killers, deadline, k=3, stats=None, cancel=None):
+    """
+    Returns the value of the board searched depth more moves with alpha-beta pruning,
+    as alphabeta_value() does, scoring unfinished games at the depth limit with evaluate().
+    Raises SearchTimeout once time.perf_counter() passes deadline or cancel is set,
+    taking back every move it pushed on the way out.
+    """
+    if time.perf_counter() > deadline or (cancel is not None and cancel.is_set()):
+        raise SearchTimeout
+    state = as_state(board, k)
+    if stats is not None:
+        visit(stats, state)
+    if state.terminal():
+        count(stats, "terminals")
+        return state.utility()  # Return the utility if the game is over
+    if depth == 0:
+        return evaluate(state.board, state.k)
+
+    ply = state.moves()
+    if state.player() == X:
+        value = -math.inf
+        for action in ordered_actions(state.board, killers.get(ply)):
+            state.push(action)
+            try:
+                value = max(value, depth_limited_value(
+                    state, depth - 1, alpha, beta, killers, deadline, stats=stats, cancel=cancel
+                ))
+            finally:
+                state.pop()
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                killers[ply] = action
+                break
+    else:
+        value = math.inf
+        for action in ordered_actions(state.board, killers.get(ply)):
+            state.push(action)
+            try:
+                value = min(value, depth_limited_value(
+                    state, depth - 1, alpha, beta, killers, deadline, stats=stats, cancel=cancel
+                ))
+            finally:
+                state.pop()
+            beta = min(beta, value)
+            if alpha >= beta:
+                killers[ply] = action
+                break
+    return value
+
+# Best value any parallel_search worker has found so far for the player to
+# move, shared between the worker processes
+_shared_bound = None
+
+def _init_parallel_worker(bound):
+    global _shared_bound
+    _shared_bound = bound
+
+def _root_move_value(board, action, depth, k):
+    """
+    Returns (value, exact) for playing action on board, searched depth moves deep
+    in total. The search only looks for values better than the shared bound, so
+    unless exact, the value is a bound no better than the one it started with.
+    """
+    state = GameState(board, k)
+    maximizing = state.player() == X
+    state.push(action)
+
+    with _shared_bound.get_lock():
+        bound = _shared_bound.value
+    alpha, beta = (bound, math.inf) if maximizing else (-math.inf, bound)
+    value = depth_limited_value(state, depth - 1, alpha, beta, {}, math.inf)
+    exact = alpha < value < beta
+
+    # Let the other workers prune against this move
+    if exact:
+        with _shared_bound.get_lock():
+            if (value > _shared_bound.value) if maximizing else (value < _shared_bound.value):
+                _shared_bound.value = value
+    return value, exact
+
+def parallel_search(board, depth=None, k=3, workers=None):
+    """
+    Returns the best action on the board found by alpha-beta searches of each
+    possible move in parallel worker processes, depth moves deep in total or to
+    the end of the game if depth is None. Positions at the depth limit are
+    scored with evaluate().
+
+    Workers share the best value found so far and prune against it. Moves whose
+    search was cut short by that bound are searched again in full if they might
+    tie the best, so the result is always the first best move in
+    ordered_actions() order, however the work was scheduled.
+    """
+    state = as_state(board, k)
+    if state.terminal():
+        return None  # No move possible if the game is over
+
+    moves = ordered_actions(state.board)
+    if depth is None:
+        depth = len(moves)
+    maximizing = state.player() == X
+    bound = multiprocessing.Value("d", -math.inf if maximizing else math.inf)
+    with ProcessPoolExecutor(workers, initializer=_init_parallel_worker, initargs=(bound,)) as executor:
+        results = list(executor.map(
+            _root_move_value, repeat(state.board), moves, repeat(depth), repeat(state.k)
+        ))
+
+    # The best exact value is the best value of any move
+    exact_values = [value for value, exact in results if exact]
+    best_value = max(exact_values) if maximizing else min(exact_values)
+
+    for action, (value, exact) in zip(moves, results):
+        if not exact and value == best_value:
+            # Cut short at the best value, so it may tie
+            state.push(action)
+            value = depth_limited_value(state, depth - 1, -math.inf, math.inf, {}, math.inf)
+            state.pop()
+        if value == best_value:
+            return action
+
+if __name__ == "__main__":
+    # Precompute the perfect-play table offline
+    save_table()
+    print(f"Saved {TABLE_FILE}.")
@@ -225,8 +225,307 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+class CNF():
+    """Tseitin encoding of sentences as clauses over integer variables.
+
+    Every compound subsentence gets a fresh variable constrained to be
+    equivalent to it, so the clauses grow linearly with the sentence
+    instead of exponentially as with distributing Or over And. A clause
+    is a list of nonzero ints: v for variable v, -v for its negation.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.count = 0
+
+        # Variable of each symbol name, and literal of each subsentence
+        self.variables = {}
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.new_variable()
+            literal = self.variables[sentence.name]
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+        elif isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            literal = self.new_variable()
+            for part in parts:
+                self.clauses.append([-literal, part])
+            self.clauses.append([literal] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            literal = self.new_variable()
+            for part in parts:
+                self.clauses.append([literal, -part])
+            self.clauses.append([-literal] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            literal = self.new_variable()
+            self.clauses += [[-literal, -a, b], [literal, a], [literal, -b]]
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.new_variable()
+            self.clauses += [[-literal, -a, b], [-literal, a, -b],
+                             [literal, a, b], [literal, -a, -b]]
+        else:
+            raise Exception(f"cannot convert {sentence} to CNF")
+
+        self.literals[sentence] = literal
+        return literal
+
+
+class Solver():
+    """CDCL SAT solver.
+
+    Unit propagation watches two literals per clause, so assigning a
+    variable only visits the clauses watching its falsified literal.
+    Each conflict is analysed to its first unique implication point,
+    the resulting clause is learnt, and the search backjumps to the
+    second highest level in it. Decisions pick the unassigned variable
+    most involved in recent conflicts, with its last assigned value.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.clauses = []
+        self.watches = [[] for _ in range(2 * count + 1)]
+
+        # Assignment of each variable, with the decision level and the
+        # index of the clause that implied it (None for decisions)
+        self.values = [None] * (count + 1)
+        self.levels = [0] * (count + 1)
+        self.reasons = [None] * (count + 1)
+        self.phases = [False] * (count + 1)
+
+        # Assigned literals in order, where each decision level starts
+        # in the trail, and how far the trail has been propagated
+        self.trail = []
+        self.trail_starts = []
+        self.propagated = 0
+
+        self.activity = [0.0] * (count + 1)
+        self.increment = 1.0
+
+        self.ok = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        """Returns the truth value of a literal, or None if unassigned."""
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def watch(self, literal):
+        """Returns the list of clauses watching the literal."""
+        return self.watches[literal if literal > 0 else self.count - literal]
+
+    def add_clause(self, clause):
+        """Adds an input clause before solving."""
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            if self.value(clause[0]) is False:
+                self.ok = False
+            elif self.value(clause[0]) is None:
+                self.assign(clause[0], None)
+        else:
+            self.attach(clause)
+
+    def attach(self, clause):
+        """Stores a clause of two or more literals, watching the first two."""
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watch(clause[0]).append(index)
+        self.watch(clause[1]).append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Assigns every implied literal.
+
+        Returns the index of a clause with all literals false, or None.
+        The implied literal of a clause is always kept at its front.
+        """
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watch(false_literal)
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Move the watch to any literal that is not false
+                for j in range(2, len(clause)):
+                    if self.value(clause[j]) is not False:
+                        clause[1], clause[j] = clause[j], clause[1]
+                        self.watch(clause[1]).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept += watching[position + 1:]
+                        watching[:] = kept
+                        return index
+                    self.assign(clause[0], index)
+            watching[:] = kept
+        return None
+
+    def analyze(self, conflict):
+        """Returns the learnt clause for a conflict and the level to backjump to."""
+        level = len(self.trail_starts)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learnt.append(other)
+
+            # Resolve with the reason of the latest literal in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal from the highest remaining level second
+        deepest = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def backjump(self, level):
+        """Undoes every assignment above the given decision level."""
+        if len(self.trail_starts) <= level:
+            return
+        start = self.trail_starts[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.trail_starts[level:]
+        self.propagated = start
+
+    def decide(self):
+        """Returns the next decision literal, or None if all are assigned."""
+        best = None
+        for variable in range(1, self.count + 1):
+            if self.values[variable] is None and (
+                best is None or self.activity[variable] > self.activity[best]
+            ):
+                best = variable
+        if best is None:
+            return None
+        return best if self.phases[best] else -best
+
+    def solve(self):
+        """Returns a satisfying assignment as a list indexed by variable,
+        or None if the clauses are unsatisfiable."""
+        if not self.ok:
+            return None
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_starts:
+                    self.ok = False
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.assign(learnt[0], self.attach(learnt))
+                self.increment /= 0.95
+            else:
+                literal = self.decide()
+                if literal is None:
+                    return list(self.values)
+                self.trail_starts.append(len(self.trail))
+                self.assign(literal, None)
+
+
+def satisfiable(sentence):
+    """Returns a model of the sentence as a dict of symbol names to
+    booleans, or None if no model exists."""
+    cnf = CNF()
+    cnf.add(sentence)
+    values = Solver(cnf.count, cnf.clauses).solve()
+    if values is None:
+        return None
+    return {name: values[variable] for name, variable in cnf.variables.items()}
+
+
+def model_check(knowledge, query, method="sat"):
+    """Checks if knowledge base entails query.
+
+    By default, checks with a SAT solver that knowledge ∧ ¬query has no
+    model. method="enumerate" checks every model instead, which is
+    exponential in the number of symbols but useful as a reference.
+    """
+    if method == "sat":
+        return satisfiable(And(knowledge, Not(query))) is None
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""